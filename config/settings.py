@@ -15,6 +15,7 @@ import environ
 import dj_database_url
 from dotenv import load_dotenv
 import os 
+import tempfile
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv()
@@ -44,6 +45,48 @@ DATABASES = {
 }
 DATABASES["default"]["ATOMIC_REQUESTS"] = True
 
+# Кеши: "default" - в памяти процесса, "sessions" и "shared" - файловые, общие для всех процессов gunicorn
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "sessions": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("SESSION_CACHE_DIR", os.path.join(tempfile.gettempdir(), "gir_sessions")),
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+    # Метки версий, общие для процессов (реестр настроек gir.settings_registry)
+    "shared": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("SHARED_CACHE_DIR", os.path.join(tempfile.gettempdir(), "gir_shared")),
+    },
+}
+SETTINGS_REGISTRY_CACHE = "shared"
+# Кеш, общий для процессов gunicorn (метки каталога API, пользователи фронтенда, попытки входа)
+SHARED_CACHE_ALIAS = "shared"
+
+# Сессии: "write_behind" (кеш + запись в БД только при изменении данных, gir.sessions),
+# "cached_db", "db", "cache" или "signed_cookies" (данные сессии фронтенда маленькие)
+SESSION_ENGINES = {
+    "write_behind": "gir.sessions",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "db": "django.contrib.sessions.backends.db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get("SESSION_BACKEND", "write_behind")]
+SESSION_CACHE_ALIAS = "sessions"
+# Скользящий срок: сессия продлевается на каждом запросе (write_behind пишет продление
+# только в кеш, а в БД - не чаще, чем раз в SESSION_DB_SYNC_SECONDS)
+SESSION_SAVE_EVERY_REQUEST = True
+SESSION_DB_SYNC_SECONDS = 24 * 60 * 60
+
+# Пользователь фронтенда кешируется по id на столько секунд (сбрасывается при сохранении)
+FRONTEND_USER_CACHE_TIMEOUT = int(os.environ.get("FRONTEND_USER_CACHE_TIMEOUT", "60"))
+
+# Импорт товаров: строк в одной пачке (каждая пачка - отдельная короткая транзакция)
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "1000"))
+
 INSTALLED_APPS = [
     "jazzmin", # admin panel
     "django.contrib.admin",
@@ -52,6 +95,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # поиск товаров: SearchVector и pg_trgm
     "gir",
 
     # third-party
@@ -75,6 +119,7 @@ if is_prod:
         "django.middleware.common.CommonMiddleware",
         "django.middleware.csrf.CsrfViewMiddleware",
         "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "gir.middleware.FrontendUserMiddleware",  # ленивый request.frontend_user
         "django.contrib.messages.middleware.MessageMiddleware",
         "django.middleware.clickjacking.XFrameOptionsMiddleware",
     ]
@@ -88,6 +133,7 @@ else:
         "django.middleware.common.CommonMiddleware",
         "django.middleware.csrf.CsrfViewMiddleware",
         "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "gir.middleware.FrontendUserMiddleware",  # ленивый request.frontend_user
         "django.contrib.messages.middleware.MessageMiddleware",
         "django.middleware.clickjacking.XFrameOptionsMiddleware",
     ]
@@ -142,6 +188,31 @@ CORS_ALLOW_HEADERS = [
 
 
 
+# Хеширование паролей. Первый хешер - для админки (как по умолчанию в Django),
+# пользователи фронтенда используют FRONTEND_PASSWORD_HASHER
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "gir.hashers.TunableScryptPasswordHasher",
+    "gir.hashers.TunableArgon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+
+# Пароли пользователей фронтенда: "scrypt" или "argon2" (нужен пакет argon2-cffi).
+# При смене алгоритма или стоимости хеш обновляется при следующем входе
+FRONTEND_PASSWORD_HASHER = os.environ.get("FRONTEND_PASSWORD_HASHER", "scrypt")
+FRONTEND_SCRYPT_WORK_FACTOR = int(os.environ.get("FRONTEND_SCRYPT_WORK_FACTOR", str(2 ** 14)))
+FRONTEND_ARGON2_TIME_COST = int(os.environ.get("FRONTEND_ARGON2_TIME_COST", "2"))
+FRONTEND_ARGON2_MEMORY_COST = int(os.environ.get("FRONTEND_ARGON2_MEMORY_COST", "102400"))  # КиБ
+
+# Вход на фронтенд: проверок пароля одновременно и в очереди на процесс,
+# лимит неудачных попыток за окно (секунд) для пары логин+IP и для IP
+FRONTEND_LOGIN_WORKERS = int(os.environ.get("FRONTEND_LOGIN_WORKERS", "2"))
+FRONTEND_LOGIN_QUEUE = int(os.environ.get("FRONTEND_LOGIN_QUEUE", "8"))
+FRONTEND_LOGIN_WINDOW = 15 * 60
+FRONTEND_LOGIN_MAX_ATTEMPTS = 5
+FRONTEND_LOGIN_MAX_IP_ATTEMPTS = 30
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -179,6 +250,9 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Файлы импорта (книги поставщиков, отчеты, файлы ошибок) - вне MEDIA_ROOT,
+# который в продакшене раздает whitenoise; отдаются только через админку (gir.storage)
+PRIVATE_MEDIA_ROOT = Path(os.environ.get("PRIVATE_MEDIA_ROOT", BASE_DIR / "private"))
 
 # Статические файлы - папка опциональна
 STATICFILES_DIRS = []
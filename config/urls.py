@@ -21,12 +21,17 @@ from django.views.generic import TemplateView
 from django.conf import settings
 from django.conf.urls.static import static
 from core.views import health, migrations_status
+from gir.api import CategoryListView, ProductDetailView, ProductListView, ProductSearchView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("gir/", include("gir.urls")),
     path("api/health/", health),
     path("api/migrations/", migrations_status),
+    path("api/products/", ProductListView.as_view(), name="api_products"),
+    path("api/products/search/", ProductSearchView.as_view(), name="api_product_search"),
+    path("api/products/<int:pk>/", ProductDetailView.as_view(), name="api_product"),
+    path("api/categories/", CategoryListView.as_view(), name="api_categories"),
     path("", include("gir.urls")),  # головна сторінка тепер використовує gir.urls
 ]
 
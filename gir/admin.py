@@ -1,13 +1,88 @@
+import io
+import os
+from functools import update_wrapper
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation, ValidationError
 from django.utils.html import format_html
 from django.urls import reverse, path
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import HttpResponseRedirect
+from django.http import FileResponse, Http404, HttpResponseRedirect, JsonResponse
 from django.urls import reverse_lazy
-from .models import User, FrontendUser, Category, Product, ImportTemplate, SettingGroup, Setting, SettingValue
-from .forms import ExcelImportForm
+from .models import User, FrontendUser, Category, Product, ImportTemplate, ImportJob, ImportedFile, ImportCheckpoint, ImportLayout, SettingGroup, Setting, SettingValue
+from .forms import ExcelImportForm, StockSyncForm
+from .importing.stock import sync_stock
+from .search import get_search_backend
+from .importing.uploads import ChunkedUpload, UploadError, UploadOffsetError
+from .storage import private_storage
+
+
+class AutocompleteListFilter(admin.RelatedFieldListFilter):
+    """
+    Фільтр за зовнішнім ключем з автодоповненням: сторінка містить лише
+    вибраний варіант, решта підвантажується пошуком через admin autocomplete.
+    Адмінка зв'язаної моделі повинна мати search_fields.
+    """
+    template = 'admin/gir/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.autocomplete_url = reverse(f'{model_admin.admin_site.name}:autocomplete')
+        self.app_label = model._meta.app_label
+        self.model_name = model._meta.model_name
+        self.field_name = field.name
+
+    def field_choices(self, field, request, model_admin):
+        # Замість усіх об'єктів - лише вибрані (для підпису в полі)
+        if not self.lookup_val:
+            return []
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        try:
+            return field.get_choices(
+                include_blank=False, ordering=ordering, limit_choices_to={'pk__in': self.lookup_val}
+            )
+        except (ValueError, ValidationError):
+            # Некоректне значення параметра - помилку покаже сам список змін
+            return []
+
+    def has_output(self):
+        return True
+
+
+class TrimmedChangeList(ChangeList):
+    """Список змін, що вибирає з бази лише колонки ``list_only`` адмінки"""
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.only(*self.model_admin.list_only)
+
+
+class TrimmedChangeListMixin:
+    """
+    Адмінка з ``list_only``: колонки лише для списку змін (форма редагування
+    вибирає всі поля). Разом з ``list_select_related`` список змін займає
+    сталу кількість запитів незалежно від кількості рядків.
+    """
+    list_only = ()
+
+    def get_changelist(self, request, **kwargs):
+        return TrimmedChangeList
+
+
+class AutocompleteFilterMedia:
+    css = {
+        'all': ('admin/css/vendor/select2/select2.css', 'admin/css/autocomplete.css'),
+    }
+    js = (
+        'admin/js/vendor/jquery/jquery.js',
+        'admin/js/vendor/select2/select2.full.js',
+        'admin/js/jquery.init.js',
+        'gir/js/autocomplete_filter.js',
+    )
+
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -67,13 +142,14 @@ class FrontendUserAdmin(admin.ModelAdmin):
     
     def save_model(self, request, obj, form, change):
         # Хешируем пароль при любых изменениях
-        if 'password' in form.changed_data or not change:
+        if change and not obj.password:
+            # Пустое поле при редактировании - пароль не меняется
+            obj.password = form.initial['password']
+        elif 'password' in form.changed_data or not change:
             if not obj.password:
-                obj.password = obj.generate_password()
-            else:
-                # Хешируем введенный пароль
-                from django.contrib.auth.hashers import make_password
-                obj.password = make_password(obj.password)
+                obj.generate_password()
+            # Хешируем введенный пароль
+            obj.set_password(obj.password)
         super().save_model(request, obj, form, change)
 
 @admin.register(Category)
@@ -91,15 +167,24 @@ class CategoryAdmin(admin.ModelAdmin):
     )
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(TrimmedChangeListMixin, admin.ModelAdmin):
     list_display = [
         'title', 'category', 'sku', 'cost_price', 'wholesale_price', 
         'stock_quantity', 'is_active', 'created_at'
     ]
-    list_filter = ['category', 'is_active', 'created_at', 'updated_at']
+    list_select_related = ['category']
+    # updated_at потрібен для збереження list_editable: auto_now пишеться лише для вибраних полів
+    list_only = [
+        'title', 'category', 'category__name', 'sku', 'cost_price', 'wholesale_price',
+        'stock_quantity', 'is_active', 'created_at', 'updated_at',
+    ]
+    list_filter = [('category', AutocompleteListFilter), 'is_active', 'created_at', 'updated_at']
     search_fields = ['title', 'sku']
     list_editable = ['is_active', 'cost_price', 'wholesale_price', 'stock_quantity']
     ordering = ['title']
+    autocomplete_fields = ['category']
+    
+    Media = AutocompleteFilterMedia
     
     fieldsets = (
         ('Основна інформація', {
@@ -116,16 +201,44 @@ class ProductAdmin(admin.ModelAdmin):
     
     change_list_template = 'admin/product_changelist.html'
     
+    def get_search_results(self, request, queryset, search_term):
+        """Пошук через gir.search (індекси замість ILIKE по search_fields)"""
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return get_search_backend().filter(queryset, search_term), False
+    
     def get_urls(self):
         from django.urls import path
         urls = super().get_urls()
+        import_view = self.permission_view(self.has_add_permission)
+        change_view = self.permission_view(self.has_change_permission)
         custom_urls = [
-            path('import-excel/', self.import_excel, name='import_excel'),
+            path('import-excel/', import_view(self.import_excel), name='import_excel'),
+            path('sync-stock/', change_view(self.sync_stock), name='sync_stock'),
+            path('import-excel/upload/', import_view(self.import_upload), name='import_upload'),
+            path('import-excel/<int:job_id>/', import_view(self.import_job_status), name='import_job_status'),
+            path(
+                'import-excel/<int:job_id>/progress/',
+                import_view(self.import_job_progress),
+                name='import_job_progress',
+            ),
+            path('import-files/<path:name>', import_view(self.private_file), name='private_file'),
         ]
         return custom_urls + urls
+
+    def permission_view(self, has_permission):
+        """admin_view, що крім is_staff перевіряє право на модель (has_add_permission тощо)"""
+        def decorator(view):
+            def wrapper(request, *args, **kwargs):
+                if not has_permission(request):
+                    raise PermissionDenied
+                return view(request, *args, **kwargs)
+            return self.admin_site.admin_view(update_wrapper(wrapper, view))
+        return decorator
     
     def import_excel(self, request):
-        """Імпорт з Excel файлу"""
+        """Імпорт з Excel файлу: файл зберігається на диск і ставиться в чергу"""
         if request.method == 'POST':
             form = ExcelImportForm(request.POST, request.FILES)
             if form.is_valid():
@@ -133,31 +246,36 @@ class ProductAdmin(admin.ModelAdmin):
                     # Отримуємо вибраний шаблон
                     import_template = form.cleaned_data['import_template']
                     
-                    # Отримуємо файл
-                    excel_file = request.FILES["excel_file"]
+                    # Отримуємо файл: вже завантажений частинами або звичайний
+                    excel_file = form.cleaned_data['excel_file']
+                    if form.cleaned_data['upload_id']:
+                        original_name = form.cleaned_data['upload_name'] or 'import.xlsx'
+                        upload = ChunkedUpload(form.cleaned_data['upload_id'], request.user.pk)
+                        excel_file = upload.complete(original_name)
+                    else:
+                        original_name = excel_file.name
                     
                     # Параметри імпорту з форми
-                    process_all = form.cleaned_data['process_all_sheets']
                     specific_sheets = form.cleaned_data['specific_sheets']
-                    
-                    # Викликаємо команду з файлом в пам'яті
-                    from django.core.management import call_command
-                    from io import BytesIO
-                    
-                    # Створюємо тимчасовий файл в пам'яті
-                    temp_file = BytesIO(excel_file.read())
-                    temp_file.name = excel_file.name
-                    
-                    # Викликаємо команду з тимчасовим файлом
+                    sheets_list = []
                     if specific_sheets and specific_sheets.strip():
                         sheets_list = [s.strip() for s in specific_sheets.split(',')]
-                        call_command('import_products', file=temp_file, sheets=sheets_list)
-                    else:
-                        call_command('import_products', file=temp_file)
                     
-                    messages.success(request, f'Імпорт успішно завершено за шаблоном "{import_template.name}"!')
+                    # Файл зберігається в приватному temp_imports частинами, без копії в пам'яті;
+                    # сам імпорт виконує run_import_worker поза HTTP запитом
+                    job = ImportJob.objects.create(
+                        import_template=import_template,
+                        file=excel_file,
+                        original_name=original_name,
+                        sheets=sheets_list,
+                        force=form.cleaned_data['force_reimport'],
+                        dry_run=form.cleaned_data['dry_run'],
+                        created_by=request.user,
+                    )
                     
-                    return HttpResponseRedirect(reverse('admin:gir_product_changelist'))
+                    messages.success(request, f'Файл "{original_name}" поставлено в чергу імпорту за шаблоном "{import_template.name}"')
+                    
+                    return HttpResponseRedirect(reverse('admin:import_job_status', args=[job.pk]))
                     
                 except Exception as e:
                     messages.error(request, f'Помилка імпорту: {str(e)}')
@@ -170,6 +288,110 @@ class ProductAdmin(admin.ModelAdmin):
             'opts': self.model._meta,
         }
         return render(request, 'admin/import_form.html', context)
+    
+    def sync_stock(self, request):
+        """Оновлення залишків і цін з CSV за артикулом"""
+        if request.method == 'POST':
+            form = StockSyncForm(request.POST, request.FILES)
+            if form.is_valid():
+                csv_file = form.cleaned_data['csv_file']
+                try:
+                    stream = io.TextIOWrapper(csv_file.file, encoding='utf-8-sig', newline='')
+                    result = sync_stock(stream)
+                except (UnicodeDecodeError, ValueError) as e:
+                    messages.error(request, f'Помилка синхронізації: {e}')
+                else:
+                    messages.success(
+                        request,
+                        f'Синхронізацію завершено: рядків {result.rows}, оновлено товарів {result.updated}, '
+                        f'не знайдено артикулів {result.not_found}, помилок {len(result.errors)}'
+                    )
+                    for row_num, error in result.errors[:20]:
+                        messages.warning(request, f'Рядок {row_num}: {error}')
+                    return HttpResponseRedirect(reverse('admin:gir_product_changelist'))
+        else:
+            form = StockSyncForm()
+        
+        context = {
+            'title': 'Оновлення залишків і цін з CSV',
+            'form': form,
+            'opts': self.model._meta,
+        }
+        return render(request, 'admin/sync_stock_form.html', context)
+    
+    def import_upload(self, request):
+        """
+        Приймає файл частинами: GET - скільки байтів вже отримано (для продовження),
+        POST - чергова частина з позиції offset.
+        """
+        try:
+            upload = ChunkedUpload(request.POST.get('upload_id') or request.GET.get('upload_id'), request.user.pk)
+            if request.method == 'POST':
+                chunk = request.FILES.get('chunk')
+                if chunk is None:
+                    return JsonResponse({'error': 'Відсутня частина файлу'}, status=400)
+                upload.append(int(request.POST.get('offset', 0)), chunk)
+        except UploadOffsetError as e:
+            return JsonResponse({'error': str(e), 'received': e.received}, status=409)
+        except (UploadError, ValueError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'upload_id': upload.upload_id, 'received': upload.received})
+    
+    def import_job_status(self, request, job_id):
+        """Сторінка стану завдання імпорту"""
+        job = get_object_or_404(ImportJob, pk=job_id)
+        context = {
+            'title': f'Імпорт: {job.original_name}',
+            'job': job,
+            'opts': self.model._meta,
+        }
+        return render(request, 'admin/import_job_status.html', context)
+    
+    def private_file(self, request, name):
+        """Файл імпорту з приватного сховища (gir.storage)"""
+        try:
+            if not private_storage.exists(name):
+                raise Http404('Файл не знайдено')
+        except SuspiciousFileOperation:
+            raise Http404('Файл не знайдено')
+        return FileResponse(private_storage.open(name, 'rb'), as_attachment=True, filename=os.path.basename(name))
+    
+    def import_job_progress(self, request, job_id):
+        """Прогрес завдання імпорту (JSON для опитування зі сторінки стану)"""
+        job = get_object_or_404(ImportJob, pk=job_id)
+        return JsonResponse({
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'finished': job.is_finished,
+            'rows_done': job.rows_done,
+            'created': job.created_count,
+            'updated': job.updated_count,
+            'unchanged': job.unchanged_count,
+            'categories': job.categories_count,
+            'errors': job.error_count,
+            'elapsed': round(job.elapsed, 1),
+            'throughput': round(job.throughput, 1),
+            'message': job.message,
+            'report_url': job.report.url if job.report else '',
+            'errors_url': job.errors_file.url if job.errors_file else '',
+        })
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'original_name', 'import_template', 'status', 'rows_done', 'created_count',
+        'updated_count', 'unchanged_count', 'error_count', 'created_by', 'created_at', 'finished_at'
+    ]
+    list_filter = ['status', 'created_at']
+    search_fields = ['original_name']
+    readonly_fields = [
+        'force', 'dry_run', 'report', 'errors_file', 'status', 'rows_done', 'created_count', 'updated_count', 'unchanged_count', 'categories_count',
+        'error_count', 'message', 'metrics', 'log', 'created_by', 'created_at', 'started_at', 'finished_at', 'heartbeat_at'
+    ]
+    
+    def has_add_permission(self, request):
+        # Завдання створюються через форму імпорту товарів
+        return False
 
 @admin.register(ImportTemplate)
 class ImportTemplateAdmin(admin.ModelAdmin):
@@ -186,13 +408,48 @@ class ImportTemplateAdmin(admin.ModelAdmin):
         }),
         ('Маппінг полів', {
             'fields': ('field_mapping',),
-            'description': 'JSON з маппінгом полів Excel → Django'
+            'description': 'JSON з маппінгом полів Excel → Django. Доступні поля: '
+                           'category, title, unit, sku, modules_count, stock_quantity, '
+                           'external_link, cost_price, wholesale_price'
         }),
         ('Налаштування обробки', {
             'fields': ('skip_empty_rows', 'create_categories')
         }),
     )
 
+@admin.register(ImportedFile)
+class ImportedFileAdmin(admin.ModelAdmin):
+    list_display = [
+        'file_name', 'import_template', 'sheets', 'created_count', 'updated_count',
+        'unchanged_count', 'error_count', 'imported_at'
+    ]
+    list_filter = ['import_template', 'imported_at']
+    search_fields = ['file_name', 'sha256']
+    readonly_fields = [
+        'sha256', 'import_template', 'sheets', 'file_name', 'rows', 'created_count', 'updated_count',
+        'unchanged_count', 'categories_count', 'error_count', 'errors_file', 'imported_at'
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['sheet', 'last_row', 'import_template', 'sha256', 'updated_at']
+    readonly_fields = ['sha256', 'import_template', 'sheet', 'last_row', 'updated_at']
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(ImportLayout)
+class ImportLayoutAdmin(admin.ModelAdmin):
+    list_display = ['fingerprint', 'header_row', 'hits', 'created_at', 'last_used_at']
+    readonly_fields = ['fingerprint', 'header_row', 'headers', 'columns', 'hits', 'created_at', 'last_used_at']
+
+    def has_add_permission(self, request):
+        return False
+
+
 # Кастомна сторінка налаштувань
 class SettingsAdmin(admin.ModelAdmin):
     def get_urls(self):
@@ -215,6 +472,28 @@ class SettingsAdmin(admin.ModelAdmin):
 admin.site.register(SettingGroup, SettingsAdmin)
 
 
+@admin.register(Setting)
+class SettingAdmin(TrimmedChangeListMixin, admin.ModelAdmin):
+    list_display = ['name', 'key', 'group', 'setting_type', 'is_active', 'order']
+    list_select_related = ['group']
+    list_only = ['name', 'key', 'group', 'group__name', 'setting_type', 'is_active', 'order']
+    list_filter = ['group', 'setting_type', 'is_active']
+    search_fields = ['name', 'key']
+
+    def get_queryset(self, request):
+        # __str__ показує назву групи - і в автодоповненні для значень налаштувань
+        return super().get_queryset(request).select_related('group')
 
 
+@admin.register(SettingValue)
+class SettingValueAdmin(TrimmedChangeListMixin, admin.ModelAdmin):
+    list_display = ['value', 'setting', 'order', 'is_active']
+    list_select_related = ['setting__group']
+    list_only = [
+        'value', 'order', 'is_active', 'setting', 'setting__name', 'setting__group', 'setting__group__name',
+    ]
+    list_filter = [('setting', AutocompleteListFilter), 'is_active']
+    search_fields = ['value']
+    autocomplete_fields = ['setting']
 
+    Media = AutocompleteFilterMedia
@@ -0,0 +1,252 @@
+"""
+API каталогу для фронтенду (лише читання).
+
+Доступ: користувач фронтенду, що увійшов через сайт (``request.frontend_user``,
+сесія), або користувач Django (сесія адмінки, Basic, JWT). Анонімні
+запити отримують 403.
+
+Список товарів гортається курсором по (title, id): наступна сторінка - це
+діапазон індексу після останнього показаного товару, без OFFSET. Відповіді
+мають ETag і Last-Modified, тож повторний запит без змін отримує 304.
+Стан для них - max(updated_at) усіх товарів по індексу, max(updated_at)
+категорій і мітка останнього видалення у спільному кеші (``touch_catalog``).
+"""
+import base64
+import binascii
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from rest_framework import generics
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .models import Category, Product
+from .search import get_search_backend
+from .serializers import CategorySerializer, ProductDetailSerializer, ProductSerializer
+
+
+CATALOG_CACHE = getattr(settings, 'SHARED_CACHE_ALIAS', 'default')
+CATALOG_DELETED_KEY = 'gir:catalog:deleted_at'
+
+TRUE_VALUES = {'1', 'true', 'yes'}
+FALSE_VALUES = {'0', 'false', 'no'}
+
+
+class IsFrontendUserOrAuthenticated(BasePermission):
+    """Користувач фронтенду (gir.middleware) або автентифікований користувач Django"""
+
+    def has_permission(self, request, view):
+        if getattr(request, 'frontend_user', None):
+            return True
+        return bool(request.user and request.user.is_authenticated)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагінація курсором по (title, id).
+
+    Курсор - закодована пара (назва, id) останнього товару сторінки;
+    вартість запиту не залежить від того, як далеко гортає клієнт.
+    """
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by('title', 'pk')
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            title, pk = position
+            # title__gte дає межу діапазону індексу, OR уточнює її серед однакових назв
+            queryset = queryset.filter(title__gte=title).filter(Q(title__gt=title) | Q(pk__gt=pk))
+
+        # Зайвий рядок показує, чи є наступна сторінка, без окремого COUNT
+        page = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_position = (page[-1].title, page[-1].pk)
+        return page
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if not value:
+            return self.page_size
+        try:
+            return max(1, min(int(value), self.max_page_size))
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'Очікується ціле число'})
+
+    def decode_cursor(self, request):
+        value = request.query_params.get(self.cursor_query_param)
+        if not value:
+            return None
+        try:
+            title, pk = json.loads(base64.urlsafe_b64decode(value.encode('ascii')))
+            if not isinstance(title, str) or not isinstance(pk, int):
+                raise ValueError(value)
+        except (ValueError, TypeError, UnicodeEncodeError, binascii.Error):
+            raise NotFound('Некоректний курсор')
+        return title, pk
+
+    def encode_cursor(self, position):
+        payload = json.dumps(list(position), ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii')
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+
+def parse_bool(params, name):
+    """Булевий параметр запиту: None, якщо не заданий"""
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError({name: 'Очікується true або false'})
+
+
+def filter_products(queryset, params):
+    """Фільтри каталогу: category (id), is_active, in_stock"""
+    category = params.get('category')
+    if category:
+        if not category.isdigit():
+            raise ValidationError({'category': 'Очікується id категорії'})
+        queryset = queryset.filter(category_id=int(category))
+
+    is_active = parse_bool(params, 'is_active')
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+
+    in_stock = parse_bool(params, 'in_stock')
+    if in_stock is True:
+        queryset = queryset.filter(stock_quantity__gt=0)
+    elif in_stock is False:
+        queryset = queryset.filter(stock_quantity__lte=0)
+    return queryset
+
+
+def touch_catalog():
+    """Мітка видалення товарів чи категорій: max(updated_at) видалення не помічає"""
+    caches[CATALOG_CACHE].set(CATALOG_DELETED_KEY, timezone.now(), None)
+
+
+def catalog_state(request):
+    """
+    Стан каталогу для умовних запитів, спільний для обох функцій декоратора
+    ``condition``. Рахується по всіх товарах, а не по відфільтрованих:
+    товар, що вибув із вибірки (деактивовано, закінчився залишок, інша
+    категорія), теж має змінити відповідь. max(updated_at) бере індекс,
+    категорій небагато, а видалення відмічає ``touch_catalog``.
+    """
+    state = getattr(request, '_catalog_state', None)
+    if state is None:
+        state = {
+            'products': Product.objects.aggregate(changed=Max('updated_at'))['changed'],
+            'categories': Category.objects.aggregate(changed=Max('updated_at'))['changed'],
+            'deleted': caches[CATALOG_CACHE].get(CATALOG_DELETED_KEY),
+        }
+        request._catalog_state = state
+    return state
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    changes = [value for value in catalog_state(request).values() if value is not None]
+    return max(changes) if changes else None
+
+
+def catalog_etag(request, *args, **kwargs):
+    state = catalog_state(request)
+    renderer = getattr(request, 'accepted_renderer', None)
+    payload = '|'.join(str(value) for value in (
+        state['products'], state['categories'], state['deleted'], getattr(renderer, 'format', ''),
+    ))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+class ProductListView(generics.ListAPIView):
+    """Список товарів: ?category=, ?is_active=, ?in_stock=, ?page_size=, ?cursor="""
+    permission_classes = [IsFrontendUserOrAuthenticated]
+    serializer_class = ProductSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = Product.objects.select_related('category').only(*ProductSerializer.only_fields())
+        return filter_products(queryset, self.request.query_params)
+
+    @method_decorator(condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class ProductSearchView(generics.ListAPIView):
+    """Пошук товарів за релевантністю: ?q=, ?limit= та фільтри списку"""
+    permission_classes = [IsFrontendUserOrAuthenticated]
+    serializer_class = ProductSerializer
+    pagination_class = None
+    default_limit = 20
+    max_limit = 100
+
+    def get_queryset(self):
+        params = self.request.query_params
+        term = params.get('q', '').strip()
+        if not term:
+            raise ValidationError({'q': "Обов'язковий параметр"})
+        try:
+            limit = max(1, min(int(params.get('limit', self.default_limit)), self.max_limit))
+        except ValueError:
+            raise ValidationError({'limit': 'Очікується ціле число'})
+        queryset = Product.objects.select_related('category').only(*ProductSerializer.only_fields())
+        return get_search_backend().search(filter_products(queryset, params), term, limit)
+
+
+def product_last_modified(request, pk):
+    changes = Product.objects.filter(pk=pk).values_list('updated_at', 'category__updated_at').first()
+    return max(changes) if changes else None
+
+
+class ProductDetailView(generics.RetrieveAPIView):
+    permission_classes = [IsFrontendUserOrAuthenticated]
+    serializer_class = ProductDetailSerializer
+    queryset = Product.objects.select_related('category')
+
+    @method_decorator(condition(last_modified_func=product_last_modified))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class CategoryListView(generics.ListAPIView):
+    """Усі категорії одним списком (їх небагато): ?is_active="""
+    permission_classes = [IsFrontendUserOrAuthenticated]
+    serializer_class = CategorySerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        queryset = Category.objects.only(*CategorySerializer.Meta.fields)
+        is_active = parse_bool(self.request.query_params, 'is_active')
+        if is_active is not None:
+            queryset = queryset.filter(is_active=is_active)
+        return queryset
@@ -10,9 +10,13 @@ class ExcelImportForm(forms.Form):
     )
     excel_file = forms.FileField(
         label='Excel файл',
+        required=False,
         help_text='Виберіть Excel файл з номенклатурою товарів',
         widget=forms.FileInput(attrs={'accept': '.xlsx,.xls'})
     )
+    # Заповнюються скриптом, якщо файл вже завантажено частинами
+    upload_id = forms.CharField(required=False, widget=forms.HiddenInput)
+    upload_name = forms.CharField(required=False, widget=forms.HiddenInput)
     process_all_sheets = forms.BooleanField(
         label='Обробити всі вкладки',
         required=False,
@@ -25,8 +29,35 @@ class ExcelImportForm(forms.Form):
         help_text='Назви вкладок через кому (наприклад: "Номенклатура ВА, Номенклатура ВБ")',
         widget=forms.TextInput(attrs={'placeholder': 'Номенклатура ВА, Номенклатура ВБ'})
     )
+    force_reimport = forms.BooleanField(
+        label='Імпортувати повторно',
+        required=False,
+        initial=False,
+        help_text='Якщо цей файл вже імпортувався з тими ж параметрами, імпорт за замовчуванням пропускається'
+    )
+    dry_run = forms.BooleanField(
+        label='Лише перевірка',
+        required=False,
+        initial=False,
+        help_text='Нічого не записувати в базу, а сформувати звіт: нові товари, змінені поля та помилки'
+    )
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         from gir.models import ImportTemplate
         self.fields['import_template'].queryset = ImportTemplate.objects.filter(is_active=True)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('excel_file') and not cleaned_data.get('upload_id'):
+            self.add_error('excel_file', 'Виберіть Excel файл')
+        return cleaned_data
+
+
+class StockSyncForm(forms.Form):
+    csv_file = forms.FileField(
+        label='CSV файл',
+        help_text='Колонки: "Артикул" і хоча б одна з "Вільно на складі", "Облікова ціна б.г. з ПДВ $", '
+                  '"Гуртова ціна з ПДВ, авт% $". Роздільник - кома або крапка з комою',
+        widget=forms.FileInput(attrs={'accept': '.csv'})
+    )
@@ -0,0 +1,56 @@
+"""
+Хешери паролів користувачів фронтенду з вартістю з налаштувань.
+
+Хеш, створений з іншою вартістю або іншим алгоритмом, оновлюється
+при наступному успішному вході (``must_update``).
+"""
+import base64
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+def frontend_hasher():
+    """Алгоритм для нових паролів FrontendUser ('scrypt', 'argon2', ...)"""
+    return getattr(settings, 'FRONTEND_PASSWORD_HASHER', 'default')
+
+
+# Верхня межа maxmem у hashlib.scrypt
+SCRYPT_MAXMEM_LIMIT = 2 ** 31 - 1
+
+
+def scrypt_maxmem(n, r, p):
+    """
+    Ліміт пам'яті для параметрів конкретного хеша: OpenSSL потребує
+    128 * r * (N + p + 2) байтів, а стандартного ліміту (32 МБ)
+    не вистачає вже для N = 2**15.
+    """
+    return min(256 * r * (n + p + 2), SCRYPT_MAXMEM_LIMIT)
+
+
+class TunableScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    maxmem рахується з N і r самого хеша, а не з поточної вартості:
+    хеш, створений з більшою вартістю до її зниження, теж перевіряється
+    (і перехешовується при вході).
+    """
+    work_factor = getattr(settings, 'FRONTEND_SCRYPT_WORK_FACTOR', ScryptPasswordHasher.work_factor)
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p, maxmem=scrypt_maxmem(n, r, p), dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash_)
+
+
+class TunableArgon2PasswordHasher(Argon2PasswordHasher):
+    """Потребує пакет argon2-cffi"""
+    time_cost = getattr(settings, 'FRONTEND_ARGON2_TIME_COST', Argon2PasswordHasher.time_cost)
+    memory_cost = getattr(settings, 'FRONTEND_ARGON2_MEMORY_COST', Argon2PasswordHasher.memory_cost)
+    parallelism = getattr(settings, 'FRONTEND_ARGON2_PARALLELISM', Argon2PasswordHasher.parallelism)
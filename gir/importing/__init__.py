@@ -0,0 +1 @@
+"""Імпорт номенклатури товарів з Excel файлів."""
@@ -0,0 +1,92 @@
+"""
+Категорії товарів під час імпорту.
+"""
+import re
+
+from gir.models import Category
+
+
+# Транслітерація українських літер (одна таблиця для str.translate)
+TRANSLIT_TABLE = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e', 'є': 'ye',
+    'ж': 'zh', 'з': 'z', 'и': 'y', 'і': 'i', 'ї': 'yi', 'й': 'y', 'к': 'k', 'л': 'l',
+    'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ь': '',
+    'ю': 'yu', 'я': 'ya'
+})
+
+SLUG_SEPARATORS = re.compile(r'[^a-z0-9]+')
+SLUG_MAX_LENGTH = Category._meta.get_field('slug').max_length
+
+
+def generate_slug(name):
+    """Генерує slug з назви категорії"""
+    # Транслітеруємо за один прохід, замінюємо пробіли та спецсимволи на дефіси
+    slug = SLUG_SEPARATORS.sub('-', name.lower().translate(TRANSLIT_TABLE))
+    return slug.strip('-')
+
+
+def unique_slug(name, taken):
+    """Slug, якого ще немає в ``taken``: при збігу додається суфікс -2, -3, ..."""
+    base = generate_slug(name)[:SLUG_MAX_LENGTH] or 'category'
+    slug = base
+    number = 2
+    while slug in taken:
+        suffix = f'-{number}'
+        slug = base[:SLUG_MAX_LENGTH - len(suffix)] + suffix
+        number += 1
+    return slug
+
+
+class CategoryResolver:
+    """
+    Відповідність назва → id категорії на час одного імпорту.
+
+    Усі категорії завантажуються один раз при першому зверненні, тож
+    пошук категорії рядка не потребує запитів. Відсутні категорії
+    створюються пачкою з унікальними slug - дві назви з однаковою
+    транслітерацією отримують різні slug замість помилки.
+
+    У режимі ``dry_run`` нові категорії лише запам'ятовуються (з id None).
+    """
+
+    def __init__(self, create=True, dry_run=False):
+        self.create = create
+        self.dry_run = dry_run
+        self._ids = None
+        self._slugs = set()
+
+    def __contains__(self, name):
+        return name in self._load()
+
+    def get(self, name):
+        """id категорії (None - категорію буде створено лише в реальному імпорті)"""
+        return self._load()[name]
+
+    def _load(self):
+        if self._ids is None:
+            self._ids = {}
+            for pk, name, slug in Category.objects.order_by('pk').values_list('pk', 'name', 'slug'):
+                self._ids.setdefault(name, pk)
+                self._slugs.add(slug)
+        return self._ids
+
+    def resolve(self, names):
+        """Створює відсутні категорії з ``names``; повертає список нових категорій"""
+        ids = self._load()
+        if not self.create:
+            return []
+
+        new_categories = []
+        for name in dict.fromkeys(names):
+            if name in ids:
+                continue
+            slug = unique_slug(name, self._slugs)
+            self._slugs.add(slug)
+            new_categories.append(Category(name=name, slug=slug, is_active=True))
+
+        if new_categories and not self.dry_run:
+            Category.objects.bulk_create(new_categories)
+        for category in new_categories:
+            ids[category.name] = category.pk
+        return new_categories
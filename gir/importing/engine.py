@@ -0,0 +1,295 @@
+from contextlib import nullcontext
+from dataclasses import dataclass, fields, replace
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from gir.importing.categories import CategoryResolver
+from gir.importing.errors import row_values
+from gir.importing.metrics import ImportMetrics
+from gir.importing.parsing import SheetLayout
+from gir.importing.report import (
+    ACTION_CREATE, ACTION_CREATE_CATEGORY, ACTION_ERROR, ACTION_UPDATE, NullChangeReport,
+)
+from gir.models import Product, title_key
+
+
+DEFAULT_BATCH_SIZE = getattr(settings, 'IMPORT_BATCH_SIZE', 1000)
+
+# Поля товару, які заповнюються з Excel (крім категорії)
+PRODUCT_FIELDS = [
+    'title', 'unit', 'sku', 'modules_count', 'stock_quantity',
+    'external_link', 'cost_price', 'wholesale_price', 'is_active', 'import_hash',
+]
+
+# Поля, які перезаписуються при оновленні існуючого товару
+UPDATE_FIELDS = ['category'] + PRODUCT_FIELDS + ['title_hash', 'updated_at']
+
+# Службові поля, які не показуються у звіті змін
+DIFF_EXCLUDE = {'import_hash'}
+
+
+@dataclass
+class ImportStats:
+    """Лічильники імпорту"""
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    categories: int = 0
+    errors: int = 0
+
+    def copy(self):
+        return replace(self)
+
+    def __add__(self, other):
+        return ImportStats(**{
+            f.name: getattr(self, f.name) + getattr(other, f.name) for f in fields(self)
+        })
+
+    def __sub__(self, other):
+        return ImportStats(**{
+            f.name: getattr(self, f.name) - getattr(other, f.name) for f in fields(self)
+        })
+
+
+class ProductImporter:
+    """
+    Пакетний (set-based) запис товарів у базу.
+
+    Рядки накопичуються у буфері і записуються пачками по ``batch_size``.
+    На кожну пачку виконується фіксована кількість запитів: вибірка товарів
+    через ``IN (...)``, ``bulk_create`` нових і ``bulk_update`` існуючих
+    записів. Категорії завантажуються один раз на імпорт
+    (див. ``categories.CategoryResolver``). Кількість запитів залежить
+    від кількості пачок, а не рядків.
+
+    Існуючі товари, чий ``import_hash`` збігається з відбитком рядка,
+    не перезаписуються - повторний імпорт без змін коштує лише читання.
+
+    У режимі ``dry_run`` виконуються ті самі вибірки, але нічого не пишеться:
+    нові товари та категорії і зміни полів існуючих товарів надходять
+    у ``report`` (див. ``gir.importing.report``).
+
+    Кожна пачка записується окремою транзакцією, тож блокування рядків
+    тримаються лише на час однієї пачки, а вже записані пачки лишаються
+    в базі при збої пізніше. Разом з пачкою в тій самій транзакції
+    викликається ``checkpoint(вкладка, останній рядок)`` - за ним
+    перерваний імпорт продовжується з місця зупинки.
+
+    Рядки з помилками не зупиняють імпорт: вони рахуються і, якщо задано
+    ``errors``, записуються з вихідними значеннями у файл помилок
+    (див. ``gir.importing.errors``).
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, log=None, progress=None,
+                 create_categories=True, dry_run=False, report=None, metrics=None,
+                 verbose_log=None, errors=None, checkpoint=None):
+        self.batch_size = batch_size
+        self.create_categories = create_categories
+        self.dry_run = dry_run
+        self.report = report or NullChangeReport()
+        self.errors = errors
+        self.checkpoint = checkpoint
+        self.metrics = metrics or ImportMetrics()
+        self.log = log or (lambda message: None)
+        # Повідомлення про кожен товар - лише на детальному рівні виводу
+        self.verbose_log = verbose_log
+        self.progress = progress or (lambda stats: None)
+        self.stats = ImportStats()
+        self.sheet = ''
+        self.layout = SheetLayout()
+        self.categories = CategoryResolver(create=create_categories, dry_run=dry_run)
+        self._pending = []
+
+    def begin_sheet(self, sheet, layout=None):
+        """Вкладка, до якої належать наступні рядки (для звітів і файлу помилок)"""
+        self.sheet = sheet
+        self.layout = layout or SheetLayout()
+
+    def add(self, row_num, data):
+        """Додає підготовлений рядок (див. ``parsing.RowTransformer``) до черги запису"""
+        self._pending.append((row_num, data))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_error(self, row_num, error, values=None, data=None):
+        """
+        Фіксує рядок, який не вдалося обробити.
+
+        ``values`` - вихідні значення рядка; якщо їх немає, вони
+        відновлюються з підготовлених даних ``data``.
+        """
+        self.stats.errors += 1
+        self.report.write(ACTION_ERROR, sheet=self.sheet, row=row_num, error=error)
+        if self.errors is not None:
+            if values is None and data is not None:
+                values = row_values(self.layout, data)
+            self.errors.write(self.sheet, self.layout.headers, row_num, values, error)
+        self.log(f'Помилка в рядку {row_num}: {error}')
+
+    def flush(self):
+        """Записує накопичені рядки однією пачкою"""
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        last_row = batch[-1][0]
+        # dry-run лише читає, транзакція і блокування не потрібні
+        with self.metrics.transaction(), nullcontext() if self.dry_run else transaction.atomic():
+            with self.metrics.phase('categories'):
+                batch = self._resolve_categories(batch)
+            self._write_products(batch)
+            if self.checkpoint is not None and not self.dry_run:
+                self.checkpoint(self.sheet, last_row)
+
+        self.stats.rows += len(batch)
+        self.log(f'Оброблено {self.stats.rows} рядків...')
+        self.progress(self.stats)
+
+    def _resolve_categories(self, batch):
+        """Знаходить або створює категорії для всієї пачки"""
+        for category in self.categories.resolve(data['category'] for _, data in batch):
+            self.stats.categories += 1
+            self.report.write(ACTION_CREATE_CATEGORY, sheet=self.sheet, title=category.name)
+            self.log(f'Створено категорію: {category.name}')
+
+        resolved = []
+        for row_num, data in batch:
+            if data['category'] in self.categories:
+                resolved.append((row_num, data))
+            else:
+                self.add_error(row_num, f'не знайдено категорію "{data["category"]}"', data=data)
+        return resolved
+
+    def _diff(self, product, data):
+        """Поля товару, які зміняться після застосування рядка: {поле: (було, стане)}"""
+        changes = {}
+        category_id = self.categories.get(data['category'])
+        if category_id is None or product.category_id != category_id:
+            changes['category'] = (product.category.name if product.category_id else None, data['category'])
+        for field, value in data.items():
+            if field == 'category' or field in DIFF_EXCLUDE or value is None or value == '':
+                continue
+            old = getattr(product, field)
+            if Product._meta.get_field(field).to_python(value) != old:
+                changes[field] = (old, value)
+        return changes
+
+    def _write_products(self, batch):
+        """Зіставляє рядки з існуючими товарами і записує зміни"""
+        with self.metrics.phase('lookup'):
+            by_sku, by_title = self._lookup_products(batch)
+
+        with self.metrics.phase('write'):
+            self._apply_rows(batch, by_sku, by_title)
+
+    def _lookup_products(self, batch):
+        """
+        Вибирає існуючі товари пачки: {артикул: товар}, {відбиток назви: товар}.
+
+        Обидва пошуки - точна рівність по індексу: артикул унікальний,
+        назви порівнюються за title_hash замість довгих рядків.
+        """
+        loaded = {}
+        by_sku = {}
+        by_title = {}
+
+        products = Product.objects.order_by('pk')
+        if self.dry_run:
+            # Назви поточних категорій потрібні для звіту змін
+            products = products.select_related('category')
+
+        # Шукаємо по артикулу, потім по назві тих, кого не знайшли
+        skus = {data['sku'] for _, data in batch if data['sku']}
+        if skus:
+            for product in products.filter(sku__in=skus):
+                product = loaded.setdefault(product.pk, product)
+                by_sku[product.sku] = product
+
+        keys = {
+            title_key(data['title']) for _, data in batch
+            if not (data['sku'] and data['sku'] in by_sku)
+        }
+        if keys:
+            for product in products.filter(title_hash__in=keys):
+                product = loaded.setdefault(product.pk, product)
+                by_title.setdefault(product.title_hash, product)
+        return by_sku, by_title
+
+    def _apply_rows(self, batch, by_sku, by_title):
+        """Застосовує рядки до знайдених товарів і пише зміни пачкою"""
+        to_create = []
+        to_update = {}
+        messages = [] if self.verbose_log else None
+        now = timezone.now()
+
+        for row_num, data in batch:
+            product = None
+            key = title_key(data['title'])
+            if data['sku']:
+                product = by_sku.get(data['sku'])
+            if product is None:
+                product = by_title.get(key)
+
+            if product is None:
+                # Створюємо новий товар
+                product = Product(category_id=self.categories.get(data['category']), title_hash=key, **{
+                    field: value for field, value in data.items() if field != 'category'
+                })
+                to_create.append(product)
+                self.stats.created += 1
+                if self.dry_run:
+                    self.report.write(
+                        ACTION_CREATE, sheet=self.sheet, row=row_num, sku=data['sku'], title=data['title'],
+                        changes={
+                            field: (None, value) for field, value in data.items()
+                            if field not in DIFF_EXCLUDE and value is not None and value != ''
+                        },
+                    )
+                if messages is not None:
+                    messages.append(f'Створено товар: {data["title"]}')
+            elif (
+                product.pk is not None
+                and product.pk not in to_update
+                and product.import_hash == data['import_hash']
+            ):
+                # Рядок не змінився з попереднього імпорту
+                self.stats.unchanged += 1
+            else:
+                # Оновлюємо існуючий (або щойно доданий у цій пачці) товар
+                if self.dry_run:
+                    self.report.write(
+                        ACTION_UPDATE, sheet=self.sheet, row=row_num, sku=data['sku'], title=data['title'],
+                        changes=self._diff(product, data),
+                    )
+                product.category_id = self.categories.get(data['category'])
+                for field, value in data.items():
+                    if field != 'category' and value is not None and value != '':
+                        setattr(product, field, value)
+                product.title_hash = key
+                if product.pk is not None:
+                    product.updated_at = now
+                    to_update[product.pk] = product
+                self.stats.updated += 1
+                if messages is not None:
+                    messages.append(f'Оновлено товар: {data["title"]}')
+
+            # Наступні рядки пачки з тим самим артикулом/назвою оновлять цей товар
+            if product.sku:
+                by_sku.setdefault(product.sku, product)
+            by_title.setdefault(product.title_hash, product)
+
+        if self.dry_run:
+            to_create, to_update = [], {}
+
+        if to_create:
+            Product.objects.bulk_create(to_create, batch_size=self.batch_size)
+        if to_update:
+            Product.objects.bulk_update(
+                list(to_update.values()), UPDATE_FIELDS, batch_size=self.batch_size
+            )
+
+        for message in messages or []:
+            self.verbose_log(message)
@@ -0,0 +1,104 @@
+"""
+Файл помилок імпорту.
+
+Кожен рядок, який не вдалося імпортувати (або імпортовано без
+некоректних числових комірок), записується з вихідними значеннями під
+тими самими заголовками, що й у вкладці файлу, плюс номер рядка і текст
+помилки. Виправлений файл помилок можна завантажити
+як звичайний імпорт - обробляться лише ці рядки.
+
+Записи пишуться потоково (openpyxl write-only або CSV), тому кількість
+помилок не впливає на пам'ять.
+"""
+import csv
+import os
+import re
+
+from openpyxl import Workbook
+
+
+ROW_HEADER = 'Рядок у файлі'
+ERROR_HEADER = 'Помилка'
+
+# Обмеження Excel на назви вкладок
+SHEET_TITLE_MAX_LENGTH = 31
+INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+def _ensure_directory(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def row_values(layout, data):
+    """Значення рядка в порядку колонок вкладки, відновлені з даних товару"""
+    values = [''] * len(layout.headers)
+    for field, index in layout.columns.items():
+        if index < len(values) and data.get(field) is not None:
+            values[index] = data[field]
+    return values
+
+
+class XlsxErrorWriter:
+    """Помилки кожної вкладки - на однойменній вкладці файлу помилок"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._workbook = Workbook(write_only=True)
+        self._sheets = {}
+
+    def _worksheet(self, sheet, headers):
+        worksheet = self._sheets.get(sheet)
+        if worksheet is None:
+            title = INVALID_SHEET_CHARS.sub('_', sheet)[:SHEET_TITLE_MAX_LENGTH] or 'Помилки'
+            worksheet = self._workbook.create_sheet(title)
+            worksheet.append([str(header) for header in headers] + [ROW_HEADER, ERROR_HEADER])
+            self._sheets[sheet] = worksheet
+        return worksheet
+
+    def write(self, sheet, headers, row, values, error):
+        width = len(headers)
+        values = list(values or [])[:width]
+        values += [''] * (width - len(values))
+        self._worksheet(sheet, headers).append(values + [row, error])
+        self.count += 1
+
+    def close(self):
+        if self.count:
+            _ensure_directory(self.path)
+            self._workbook.save(self.path)
+
+
+class CsvErrorWriter:
+    """Один CSV на всі вкладки: вкладка, рядок, помилка і значення рядка"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._stream = None
+        self._headers = {}
+
+    def write(self, sheet, headers, row, values, error):
+        if self._stream is None:
+            _ensure_directory(self.path)
+            self._stream = open(self.path, 'w', encoding='utf-8', newline='')
+            self._writer = csv.writer(self._stream)
+        if self._headers.get(sheet) != headers:
+            # Перед першою помилкою вкладки - її заголовки
+            self._headers[sheet] = headers
+            self._writer.writerow(['Вкладка', ROW_HEADER, ERROR_HEADER] + [str(h) for h in headers])
+        self._writer.writerow([sheet, row, error] + ['' if v is None else v for v in values or []])
+        self.count += 1
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+
+
+def open_errors(path):
+    """Файл помилок; формат визначається розширенням (.csv або .xlsx). Створюється лише за наявності помилок"""
+    if path.lower().endswith('.csv'):
+        return CsvErrorWriter(path)
+    return XlsxErrorWriter(path)
@@ -0,0 +1,134 @@
+"""
+Метрики імпорту: час за фазами, кількість запитів до бази, швидкість по вкладках.
+"""
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict
+from time import perf_counter
+
+from django.db import connection
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Фази у порядку виконання (для стабільного виводу)
+PHASES = ['open', 'headers', 'parse', 'categories', 'lookup', 'write']
+
+
+def peak_rss_mb():
+    """Пікове використання пам'яті процесом і його дочірніми процесами, МБ"""
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # Linux повертає кілобайти, macOS - байти
+    divider = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divider, 1)
+
+
+class QueryCounter:
+    """execute_wrapper, що рахує запити до бази (працює і без DEBUG)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class ImportMetrics:
+    """Збирає час фаз і підсумки по вкладках для JSON-звіту"""
+
+    def __init__(self):
+        self.phases = defaultdict(float)
+        self.sheets = []
+        self.queries = QueryCounter()
+        self.transactions = 0
+        self.max_transaction = 0.0
+        self._started = perf_counter()
+        self._sheet = None
+
+    def add(self, phase, seconds):
+        self.phases[phase] += seconds
+
+    @contextmanager
+    def phase(self, name):
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += perf_counter() - started
+
+    def timed(self, iterable, phase):
+        """Генератор, що додає до фази час отримання кожного елемента"""
+        iterator = iter(iterable)
+        while True:
+            started = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.phases[phase] += perf_counter() - started
+                return
+            self.phases[phase] += perf_counter() - started
+            yield item
+
+    @contextmanager
+    def transaction(self):
+        """Час транзакції пачки: найдовша показує, як довго тримаються блокування"""
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.transactions += 1
+            self.max_transaction = max(self.max_transaction, perf_counter() - started)
+
+    @contextmanager
+    def count_queries(self):
+        """Рахує всі запити основного з'єднання всередині блоку"""
+        with connection.execute_wrapper(self.queries):
+            yield
+
+    def start_sheet(self, name, stats):
+        self._sheet = (name, perf_counter(), self.queries.count, stats.copy())
+
+    def finish_sheet(self, stats):
+        name, started, queries, before = self._sheet
+        seconds = perf_counter() - started
+        sheet_stats = stats - before
+        self.sheets.append({
+            'name': name,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(sheet_stats.rows / seconds, 1) if seconds else 0.0,
+            'queries': self.queries.count - queries,
+            **asdict(sheet_stats),
+        })
+        self._sheet = None
+        return sheet_stats
+
+    def summary(self, stats, **extra):
+        """Структурований підсумок імпорту (серіалізується в JSON)"""
+        seconds = perf_counter() - self._started
+        return {
+            **extra,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(stats.rows / seconds, 1) if seconds else 0.0,
+            'queries': self.queries.count,
+            'queries_per_row': round(self.queries.count / stats.rows, 4) if stats.rows else 0.0,
+            'peak_rss_mb': peak_rss_mb(),
+            'transactions': self.transactions,
+            'max_transaction_seconds': round(self.max_transaction, 3),
+            'phases': {
+                name: round(self.phases[name], 3)
+                for name in PHASES + sorted(set(self.phases) - set(PHASES))
+                if name in self.phases
+            },
+            'stats': asdict(stats),
+            'sheets': self.sheets,
+        }
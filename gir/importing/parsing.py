@@ -0,0 +1,459 @@
+"""
+Розбір рядків Excel у дані товарів.
+
+Модуль не звертається до бази і не імпортує моделі, тому його функції
+можна виконувати в окремих процесах (див. ``import_products --workers``).
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from time import perf_counter
+
+from gir.importing.reader import find_header_row, iter_rows, open_workbook, read_row
+
+
+# Маппінг полів Excel → Django
+DEFAULT_FIELD_MAPPING = {
+    'Категорія': 'category',
+    'Найменування': 'title',
+    'Од.вим': 'unit',
+    'Облікова ціна б.г. з ПДВ $': 'cost_price',
+    'Гуртова ціна з ПДВ, авт% $': 'wholesale_price',
+    'Артикул': 'sku',
+    'Кількість модулів': 'modules_count',
+    'Вільно на складі': 'stock_quantity',
+    'Посилання': 'external_link'
+}
+
+REQUIRED_FIELDS = ['category', 'title']
+
+# Поля, з яких рахується відбиток рядка (Product.import_hash)
+FINGERPRINT_FIELDS = [
+    'category', 'title', 'unit', 'sku', 'modules_count', 'stock_quantity',
+    'external_link', 'cost_price', 'wholesale_price',
+]
+
+
+# CharField(max_length=...) товару і назви категорії: довше значення
+# обірвало б запис усієї пачки помилкою бази
+MAX_LENGTHS = {
+    'category': 255,
+    'title': 500,
+    'unit': 50,
+    'sku': 100,
+    'external_link': 500,
+}
+
+# DecimalField(max_digits=10, decimal_places=2) і IntegerField товару
+PRICE_QUANTUM = Decimal('0.01')
+PRICE_LIMIT = Decimal(10) ** 8
+INT_LIMIT = 2 ** 31 - 1
+
+# Роздільники тисяч: пробіл, нерозривний і вузький пробіл, апостроф
+THOUSANDS_SEPARATORS = str.maketrans('', '', ' \u00a0\u202f\'\u2019')
+
+
+class InvalidNumber(ValueError):
+    pass
+
+
+def is_empty(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def to_decimal(value):
+    """Точне Decimal значення числа або рядка ('1 234,50', '1,234.50', '1234.5')"""
+    if isinstance(value, bool):
+        raise InvalidNumber(value)
+    if isinstance(value, (int, Decimal)):
+        number = Decimal(value)
+    elif isinstance(value, float):
+        # repr дає найкоротший запис float: 6.9, а не 6.9000000000000003552...
+        number = Decimal(repr(value))
+    elif isinstance(value, str):
+        text = value.strip().translate(THOUSANDS_SEPARATORS)
+        if ',' in text and '.' in text:
+            # Десятковий роздільник - той, що стоїть останнім
+            if text.rfind(',') > text.rfind('.'):
+                text = text.replace('.', '').replace(',', '.')
+            else:
+                text = text.replace(',', '')
+        else:
+            text = text.replace(',', '.')
+        try:
+            number = Decimal(text)
+        except InvalidOperation:
+            raise InvalidNumber(value)
+    else:
+        raise InvalidNumber(value)
+    if not number.is_finite():
+        raise InvalidNumber(value)
+    return number
+
+
+def parse_int(value, default=None):
+    """Парсинг цілого числа (дробова частина відкидається)"""
+    if is_empty(value):
+        return default
+    number = int(to_decimal(value))
+    if abs(number) > INT_LIMIT:
+        raise InvalidNumber(value)
+    return number
+
+
+def parse_decimal(value):
+    """Парсинг ціни: Decimal з двома знаками після коми"""
+    if is_empty(value):
+        return None
+    number = to_decimal(value)
+    if abs(number) >= PRICE_LIMIT:
+        raise InvalidNumber(value)
+    return number.quantize(PRICE_QUANTUM, rounding=ROUND_HALF_UP)
+
+
+def clean_str(value):
+    """Рядкове значення комірки без пробілів по краях ('' для порожньої)"""
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def parse_stock(value):
+    return parse_int(value, default=0)
+
+
+def parse_price(value):
+    # Порожня або нульова ціна не перезаписує наявну
+    return parse_decimal(value) if value else None
+
+
+# Конвертер значення комірки для кожного поля, яке можна імпортувати
+FIELD_CONVERTERS = {
+    'category': clean_str,
+    'title': clean_str,
+    'unit': clean_str,
+    'sku': clean_str,
+    'modules_count': parse_int,
+    'stock_quantity': parse_stock,
+    'external_link': clean_str,
+    'cost_price': parse_price,
+    'wholesale_price': parse_price,
+}
+
+# Числові поля перетворюються не по рядку, а по колонці для пачки рядків
+NUMERIC_FIELDS = ['modules_count', 'stock_quantity', 'cost_price', 'wholesale_price']
+
+# Скільки рядків розбирається однією пачкою (див. parse_rows)
+PARSE_CHUNK_SIZE = 1000
+
+# Позначка некоректної комірки в кеші перетворень колонки
+_INVALID = object()
+
+
+def row_fingerprint(data):
+    """SHA-256 нормалізованих полів рядка; однаковий відбиток - товар не змінився"""
+    payload = '\x1f'.join(
+        '' if data.get(name) is None else str(data[name]) for name in FINGERPRINT_FIELDS
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def map_columns(headers, field_mapping=None):
+    """
+    Знаходить індекси колонок для полів товару.
+
+    Спочатку шукається точний збіг заголовка, потім - входження
+    назви з маппінгу в текст заголовка.
+    """
+    field_mapping = field_mapping or DEFAULT_FIELD_MAPPING
+    header_texts = [str(header).strip() for header in headers]
+
+    column_indices = {}
+    for excel_field, django_field in field_mapping.items():
+        if excel_field in header_texts:
+            column_indices.setdefault(django_field, header_texts.index(excel_field))
+
+    for i, header in enumerate(header_texts):
+        for excel_field, django_field in field_mapping.items():
+            if django_field not in column_indices and excel_field in header:
+                column_indices[django_field] = i
+                break
+    return column_indices
+
+
+def has_required_columns(column_indices):
+    return all(field in column_indices for field in REQUIRED_FIELDS)
+
+
+class RowTransformer:
+    """
+    Перетворювач рядків для конкретного розташування колонок.
+
+    Індекси колонок і конвертери полів визначаються один раз при компіляції,
+    тож на кожен рядок припадає лише доступ за індексом і виклик конвертера.
+    Числові колонки лишаються сирими до ``convert_columns``, який обробляє
+    їх для всієї пачки рядків.
+    """
+
+    def __init__(self, columns, skip_empty_rows=True):
+        self.columns = columns
+        self.skip_empty_rows = skip_empty_rows
+        self._category_index = columns['category']
+        self._title_index = columns['title']
+        self._converters = [
+            (name, index, FIELD_CONVERTERS[name])
+            for name, index in columns.items()
+            if name not in REQUIRED_FIELDS and name not in NUMERIC_FIELDS
+        ]
+        self._numeric = [
+            (name, index, FIELD_CONVERTERS[name])
+            for name, index in columns.items()
+            if name in NUMERIC_FIELDS
+        ]
+        self._max_lengths = [(name, limit) for name, limit in MAX_LENGTHS.items() if name in columns]
+
+    def __call__(self, row):
+        """Дані товару з кортежу значень рядка або None для пропущеного рядка"""
+        width = len(row)
+        category = clean_str(row[self._category_index] if self._category_index < width else None)
+        title = clean_str(row[self._title_index] if self._title_index < width else None)
+
+        if not category or not title:
+            if self.skip_empty_rows or not any(value is not None for value in row):
+                return None
+            raise ValueError('відсутня категорія або найменування')
+
+        data = {'category': category, 'title': title}
+        for name, index, convert in self._converters:
+            data[name] = convert(row[index] if index < width else None)
+        for name, index, convert in self._numeric:
+            data[name] = row[index] if index < width else None
+        for name, limit in self._max_lengths:
+            if len(data[name]) > limit:
+                raise ValueError(f'поле {name} довше за {limit} символів ({len(data[name])})')
+        data['is_active'] = True
+        return data
+
+    def convert_columns(self, batch):
+        """
+        Перетворює числові колонки пачки даних (один прохід на колонку)
+        і рахує відбитки рядків.
+
+        Однакові значення колонки перетворюються один раз. Числові поля
+        не обов'язкові: некоректна комірка вважається порожньою (None,
+        для залишку - 0), рядок імпортується. Повертає
+        {позиція в пачці: [(поле, значення), ...]} для некоректних комірок.
+        """
+        invalid = {}
+        for name, index, convert in self._numeric:
+            converted = {}
+            for position, data in enumerate(batch):
+                value = data[name]
+                key = (value.__class__, value)
+                result = converted.get(key, _INVALID)
+                if result is _INVALID and key not in converted:
+                    try:
+                        result = convert(value)
+                    except (InvalidNumber, ArithmeticError):
+                        result = _INVALID
+                    converted[key] = result
+                if result is _INVALID:
+                    invalid.setdefault(position, []).append((name, value))
+                    data[name] = convert(None)
+                else:
+                    data[name] = result
+        for data in batch:
+            data['import_hash'] = row_fingerprint(data)
+        return invalid
+
+
+@dataclass
+class SheetLayout:
+    """Розташування колонок вкладки: рядок заголовків і індекси полів"""
+    header_row: int = None
+    headers: list = field(default_factory=list)
+    columns: dict = field(default_factory=dict)
+    fingerprint: str = ''
+    # True - розкладку взято з кешу, пошук заголовків і маппінг пропущено
+    cached: bool = False
+
+    @property
+    def data_row(self):
+        """Перший рядок даних"""
+        return (self.header_row or 1) + 1
+
+
+@dataclass
+class CompiledTemplate:
+    """
+    Налаштування шаблону імпорту без прив'язки до моделі.
+
+    Створюється один раз на імпорт (``from_template``) і передається
+    процесам пулу; для кожної вкладки ``detect_layout`` визначає розкладку
+    колонок, а ``compile`` повертає ``RowTransformer``.
+
+    ``layouts`` - відомі розкладки {відбиток: {'row': ..., 'columns': ...}}
+    (див. ``ImportLayout``): якщо рядок заголовків вкладки збігається
+    з відомим, пошук заголовків і маппінг колонок не виконуються.
+    """
+    field_mapping: dict = field(default_factory=lambda: dict(DEFAULT_FIELD_MAPPING))
+    sheets: list = field(default_factory=list)
+    skip_empty_rows: bool = True
+    create_categories: bool = True
+    layouts: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_template(cls, template):
+        """Компілює ImportTemplate (або None - стандартний маппінг)"""
+        if template is None:
+            return cls()
+        sheets = []
+        if not template.process_all_sheets and template.sheet_name:
+            sheets = [s.strip() for s in template.sheet_name.split(',') if s.strip()]
+        return cls(
+            field_mapping=dict(template.field_mapping or DEFAULT_FIELD_MAPPING),
+            sheets=sheets,
+            skip_empty_rows=template.skip_empty_rows,
+            create_categories=template.create_categories,
+        )
+
+    @property
+    def header_marker(self):
+        """Текст заголовка колонки категорії - по ньому знаходимо рядок заголовків"""
+        for excel_field, django_field in self.field_mapping.items():
+            if django_field == 'category':
+                return excel_field
+        return 'Категорія'
+
+    def layout_fingerprint(self, header_row, headers):
+        """SHA-256 рядка заголовків (номер і текст) разом з маппінгом шаблону"""
+        texts = [str(header).strip() for header in headers]
+        while texts and not texts[-1]:
+            texts.pop()
+        payload = json.dumps(
+            [self.field_mapping, header_row, texts], ensure_ascii=False, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def detect_layout(self, worksheet):
+        """Розкладка колонок вкладки: з кешу відомих розкладок або пошуком заголовків"""
+        for row_num in sorted({layout['row'] for layout in self.layouts.values()}):
+            headers = read_row(worksheet, row_num)
+            fingerprint = self.layout_fingerprint(row_num, headers)
+            known = self.layouts.get(fingerprint)
+            if known is not None:
+                return SheetLayout(
+                    header_row=row_num, headers=headers, columns=dict(known['columns']),
+                    fingerprint=fingerprint, cached=True,
+                )
+
+        row_num, headers = find_header_row(worksheet, marker=self.header_marker)
+        if not headers:
+            return SheetLayout()
+        return SheetLayout(
+            header_row=row_num, headers=headers,
+            columns=map_columns(headers, self.field_mapping),
+            fingerprint=self.layout_fingerprint(row_num, headers),
+        )
+
+    def compile(self, columns):
+        """RowTransformer для індексів колонок або None без обов'язкових полів"""
+        if not has_required_columns(columns):
+            return None
+        return RowTransformer(columns, skip_empty_rows=self.skip_empty_rows)
+
+
+def validate_field_mapping(field_mapping):
+    """Список помилок у маппінгу шаблону (порожній - маппінг коректний)"""
+    if not isinstance(field_mapping, dict):
+        return ['Маппінг має бути JSON об\'єктом {"Заголовок Excel": "поле"}']
+    errors = []
+    for excel_field, django_field in field_mapping.items():
+        if django_field not in FIELD_CONVERTERS:
+            errors.append(f'Невідоме поле "{django_field}" для колонки "{excel_field}"')
+    if field_mapping:
+        missing = [name for name in REQUIRED_FIELDS if name not in field_mapping.values()]
+        if missing:
+            errors.append(f'Відсутні обов\'язкові поля: {", ".join(missing)}')
+    return errors
+
+
+def parse_rows(rows, transformer, chunk_size=PARSE_CHUNK_SIZE):
+    """
+    Генерує (номер рядка, дані товару, вихідні значення, помилка) для рядків вкладки.
+
+    Рядки розбираються пачками по ``chunk_size``: числові колонки пачки
+    перетворюються разом. Рядок, який не вдалося розібрати, має дані
+    None; рядок з некоректними числовими комірками імпортується без них,
+    а помилка лише фіксується. Вихідні значення передаються лише разом
+    з помилкою (для файлу помилок). Рядки без категорії або найменування
+    пропускаються.
+    """
+    chunk = []
+    for row_num, row in rows:
+        try:
+            product_data = transformer(row)
+        except Exception as e:
+            chunk.append((row_num, row, None, str(e)))
+        else:
+            if product_data is not None:
+                chunk.append((row_num, row, product_data, None))
+        if len(chunk) >= chunk_size:
+            yield from _convert_chunk(chunk, transformer)
+            chunk = []
+    yield from _convert_chunk(chunk, transformer)
+
+
+def _convert_chunk(chunk, transformer):
+    invalid = transformer.convert_columns([data for _, _, data, _ in chunk if data is not None])
+    position = 0
+    for row_num, row, data, error in chunk:
+        if data is None:
+            yield row_num, None, list(row), error
+            continue
+        cells = invalid.get(position)
+        position += 1
+        if cells:
+            yield row_num, data, list(row), '; '.join(
+                f'некоректне число у полі {name}: "{value}" (поле не імпортовано)' for name, value in cells
+            )
+        else:
+            yield row_num, data, None, None
+
+
+@dataclass
+class ParsedSheet:
+    """Результат розбору однієї вкладки"""
+    name: str
+    layout: SheetLayout = field(default_factory=SheetLayout)
+    rows: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def parse_sheet(source, sheet_name, template=None, start_row=None):
+    """
+    Повністю розбирає одну вкладку книги (або рядки від ``start_row``).
+
+    Точка входу для процесів пулу: відкриває файл самостійно і повертає
+    лише прості структури, які передаються назад через pickle. Вкладка
+    повертається цілком, тож пам'ять записувача зростає з її розміром -
+    послідовний імпорт (``parse_rows``) тримає в пам'яті лише одну пачку.
+    """
+    template = template or CompiledTemplate()
+    started = perf_counter()
+    with open_workbook(source) as workbook:
+        worksheet = workbook[sheet_name]
+        parsed = ParsedSheet(name=sheet_name, layout=template.detect_layout(worksheet))
+        if parsed.layout.headers:
+            transformer = template.compile(parsed.layout.columns)
+            if transformer is not None:
+                rows = iter_rows(worksheet, min_row=max(parsed.layout.data_row, start_row or 0))
+                for row_num, data, values, error in parse_rows(rows, transformer):
+                    if error is not None:
+                        parsed.errors.append((row_num, error, values))
+                    if data is not None:
+                        parsed.rows.append((row_num, data))
+    parsed.seconds = perf_counter() - started
+    return parsed
@@ -0,0 +1,92 @@
+import hashlib
+from contextlib import contextmanager
+
+from openpyxl import load_workbook
+
+
+# Вкладки кошторису, які не містять номенклатури
+SYSTEM_SHEETS = [
+    'Зміст', 'Титул', 'Зміст_2', 'Титул_2',
+    'Кошторис', 'Кошторис_2', 'Кошторис_3',
+    'Відомість', 'Відомість_2', 'Відомість_3',
+    'Сума', 'Сума_2', 'Сума_3',
+    'Копія аркуша', 'ТЕХ_ЛИСТ', 'ТЗ', 'Розрахунок',
+    'Вартість монтажу', 'Показники', 'Довідкові дані',
+    'Інструкції', 'РЕЗЕРВ аркуша', 'Прайс'
+]
+
+# Скільки перших рядків переглядаємо в пошуках заголовків
+HEADER_SEARCH_ROWS = 20
+
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+def is_system_sheet(sheet_name):
+    """Перевіряє чи є вкладка системною"""
+    return any(sys_name.lower() in sheet_name.lower() for sys_name in SYSTEM_SHEETS)
+
+
+def file_digest(source):
+    """SHA-256 вмісту файлу (шлях або файловий об'єкт), читаючи його частинами"""
+    digest = hashlib.sha256()
+    if hasattr(source, 'read'):
+        position = source.tell()
+        source.seek(0)
+        for chunk in iter(lambda: source.read(DIGEST_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        source.seek(position)
+    else:
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(DIGEST_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def open_workbook(source):
+    """
+    Відкриває книгу у потоковому режимі (read-only).
+
+    У цьому режимі openpyxl не будує об'єкти комірок для всієї книги,
+    а читає XML вкладки по мірі ітерації, тому пам'ять не залежить
+    від розміру файлу. Книгу обов'язково треба закрити.
+    """
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        yield workbook
+    finally:
+        workbook.close()
+
+
+def select_sheets(workbook, specific_sheets=None):
+    """Визначає які вкладки обробляти"""
+    if specific_sheets:
+        return [s for s in specific_sheets if s in workbook.sheetnames]
+    # Обробляємо всі вкладки, крім системних
+    return [s for s in workbook.sheetnames if not is_system_sheet(s)]
+
+
+def read_row(worksheet, row_num):
+    """Значення одного рядка ('' замість порожніх комірок)"""
+    for row in worksheet.iter_rows(min_row=row_num, max_row=row_num, values_only=True):
+        return [value if value else '' for value in row]
+    return []
+
+
+def find_header_row(worksheet, marker='Категорія'):
+    """
+    Знаходить рядок заголовків у вкладці: (номер рядка, заголовки).
+
+    Кожен рядок переглядається один раз; заголовками вважається перший
+    рядок, у якому є комірка з ``marker``. Якщо не знайдено - (None, []).
+    """
+    rows = worksheet.iter_rows(min_row=1, max_row=HEADER_SEARCH_ROWS, values_only=True)
+    for row_num, row in enumerate(rows, start=1):
+        if any(value and marker in str(value) for value in row):
+            return row_num, [value if value else '' for value in row]
+    return None, []
+
+
+def iter_rows(worksheet, min_row=2):
+    """Генерує (номер рядка, кортеж значень) без створення об'єктів комірок"""
+    return enumerate(worksheet.iter_rows(min_row=min_row, values_only=True), start=min_row)
@@ -0,0 +1,75 @@
+"""
+Звіт про зміни імпорту (режим --dry-run).
+
+Записи пишуться у файл одразу по мірі обробки пачок, тому звіт
+не накопичується в пам'яті незалежно від розміру файлу.
+"""
+import csv
+import json
+import os
+
+
+ACTION_CREATE = 'create'
+ACTION_UPDATE = 'update'
+ACTION_CREATE_CATEGORY = 'create_category'
+ACTION_ERROR = 'error'
+
+
+class JsonlChangeReport:
+    """Один JSON об'єкт на рядок файлу"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, action, sheet='', row=None, sku='', title='', changes=None, error=''):
+        record = {'action': action, 'sheet': sheet, 'row': row, 'sku': sku, 'title': title}
+        if changes:
+            record['changes'] = {field: [old, new] for field, (old, new) in changes.items()}
+        if error:
+            record['error'] = error
+        self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+
+class CsvChangeReport:
+    """CSV: кожна змінена колонка товару - окремий рядок звіту"""
+
+    COLUMNS = ['action', 'sheet', 'row', 'sku', 'title', 'field', 'old', 'new', 'error']
+
+    def __init__(self, stream):
+        self.writer = csv.writer(stream)
+        self.writer.writerow(self.COLUMNS)
+
+    def write(self, action, sheet='', row=None, sku='', title='', changes=None, error=''):
+        base = [action, sheet, row if row is not None else '', sku, title]
+        if not changes:
+            self.writer.writerow(base + ['', '', '', error])
+            return
+        for field, (old, new) in changes.items():
+            self.writer.writerow(base + [
+                field,
+                '' if old is None else old,
+                '' if new is None else new,
+                error,
+            ])
+
+
+class NullChangeReport:
+    """Звіт, який нічого не записує (звичайний імпорт)"""
+
+    def write(self, *args, **kwargs):
+        pass
+
+
+def open_report(path):
+    """
+    Відкриває файл звіту; формат визначається розширенням (.jsonl або .csv).
+
+    Повертає (звіт, файл) - файл треба закрити після імпорту.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    stream = open(path, 'w', encoding='utf-8', newline='')
+    if path.lower().endswith(('.jsonl', '.json')):
+        return JsonlChangeReport(stream), stream
+    return CsvChangeReport(stream), stream
@@ -0,0 +1,226 @@
+"""
+Швидке оновлення залишків і цін товарів з CSV за артикулом.
+
+На PostgreSQL рядки потоком передаються через ``COPY`` у тимчасову таблицю,
+а товари оновлюються одним ``UPDATE ... FROM``. На інших базах (SQLite)
+працює запасний варіант: тимчасова таблиця і UPDATE пачками.
+"""
+import csv
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from gir.importing.parsing import DEFAULT_FIELD_MAPPING, InvalidNumber, clean_str, parse_price, parse_stock
+from gir.models import Product
+
+
+# Поля, які оновлює синхронізація
+STOCK_FIELDS = ['stock_quantity', 'cost_price', 'wholesale_price']
+
+STOCK_CONVERTERS = {
+    'stock_quantity': parse_stock,
+    'cost_price': parse_price,
+    'wholesale_price': parse_price,
+}
+
+GENERIC_BATCH_SIZE = 10000
+COPY_BUFFER_ROWS = 1000
+
+
+@dataclass
+class StockSyncResult:
+    rows: int = 0
+    updated: int = 0
+    not_found: int = 0
+    errors: list = field(default_factory=list)
+
+
+def map_stock_columns(headers):
+    """Індекси колонок CSV: назви як у кошторисі або назви полів моделі"""
+    columns = {}
+    for index, header in enumerate(headers):
+        header = header.strip()
+        name = DEFAULT_FIELD_MAPPING.get(header, header)
+        if name in ('sku', *STOCK_FIELDS):
+            columns.setdefault(name, index)
+    return columns
+
+
+def read_stock_csv(stream, result):
+    """
+    Генерує (артикул, залишок, облікова ціна, гуртова ціна) з CSV.
+
+    Роздільник (',' або ';') визначається за першим рядком. Відсутня колонка
+    або порожня ціна дають None - таке поле не змінюється. Рядки
+    з некоректними числами потрапляють у ``result.errors``.
+    """
+    first_line = stream.readline()
+    delimiter = ';' if first_line.count(';') > first_line.count(',') else ','
+    headers = next(csv.reader([first_line], delimiter=delimiter), [])
+    columns = map_stock_columns(headers)
+    if 'sku' not in columns:
+        raise ValueError('У CSV немає колонки "Артикул" (sku)')
+    fields = [name for name in STOCK_FIELDS if name in columns]
+    if not fields:
+        raise ValueError('У CSV немає колонок залишку або цін')
+
+    sku_index = columns['sku']
+    for row_num, row in enumerate(csv.reader(stream, delimiter=delimiter), start=2):
+        sku = clean_str(row[sku_index]) if sku_index < len(row) else ''
+        if not sku:
+            continue
+        result.rows += 1
+        values = {}
+        try:
+            for name in fields:
+                index = columns[name]
+                value = row[index] if index < len(row) else None
+                values[name] = STOCK_CONVERTERS[name](value) if value not in (None, '') else None
+        except (InvalidNumber, ArithmeticError) as e:
+            result.errors.append((row_num, f'некоректне число: "{e}"'))
+            continue
+        yield sku, values.get('stock_quantity'), values.get('cost_price'), values.get('wholesale_price')
+
+
+class _CopyStream:
+    """Файлоподібний об'єкт для COPY: віддає рядки генератора частинами"""
+
+    def __init__(self, records):
+        self._records = records
+        self._buffer = ''
+
+    def _format(self, record):
+        return '\t'.join('\\N' if value is None else str(value) for value in record) + '\n'
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            lines = []
+            for record in self._records:
+                # Артикул не може містити табуляцію чи перенос рядка у форматі COPY
+                sku = record[0].replace('\\', '\\\\').replace('\t', ' ').replace('\n', ' ').replace('\r', ' ')
+                lines.append(self._format((sku, *record[1:])))
+                if len(lines) >= COPY_BUFFER_ROWS:
+                    break
+            if not lines:
+                break
+            self._buffer += ''.join(lines)
+        if size < 0:
+            data, self._buffer = self._buffer, ''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _sync_postgresql(records, result):
+    table = Product._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMP TABLE gir_stock_sync ('
+            ' n serial, sku varchar(100), stock_quantity integer,'
+            ' cost_price numeric(10, 2), wholesale_price numeric(10, 2)'
+            ') ON COMMIT DROP'
+        )
+        cursor.cursor.copy_expert(
+            'COPY gir_stock_sync (sku, stock_quantity, cost_price, wholesale_price) FROM STDIN',
+            _CopyStream(records),
+        )
+        # Якщо артикул повторюється у файлі - діє останній рядок;
+        # товари без змін не перезаписуються (менше мертвих версій рядків)
+        cursor.execute(
+            f'''
+            UPDATE {table} AS p SET
+                stock_quantity = COALESCE(s.stock_quantity, p.stock_quantity),
+                cost_price = COALESCE(s.cost_price, p.cost_price),
+                wholesale_price = COALESCE(s.wholesale_price, p.wholesale_price),
+                import_hash = '',
+                updated_at = %s
+            FROM (
+                SELECT DISTINCT ON (sku) sku, stock_quantity, cost_price, wholesale_price
+                FROM gir_stock_sync ORDER BY sku, n DESC
+            ) AS s
+            WHERE p.sku = s.sku AND (
+                p.stock_quantity IS DISTINCT FROM COALESCE(s.stock_quantity, p.stock_quantity)
+                OR p.cost_price IS DISTINCT FROM COALESCE(s.cost_price, p.cost_price)
+                OR p.wholesale_price IS DISTINCT FROM COALESCE(s.wholesale_price, p.wholesale_price)
+            )
+            ''',
+            [timezone.now()],
+        )
+        result.updated = cursor.rowcount
+        cursor.execute(
+            f'SELECT count(DISTINCT s.sku) FROM gir_stock_sync AS s '
+            f'WHERE NOT EXISTS (SELECT 1 FROM {table} AS p WHERE p.sku = s.sku)'
+        )
+        result.not_found = cursor.fetchone()[0]
+
+
+def _sync_generic(records, result):
+    """
+    Запасний варіант для інших баз (SQLite): пачки рядків вставляються
+    в тимчасову таблицю, товари оновлюються одним UPDATE на пачку
+    з корельованими підзапитами (стандартний SQL без UPDATE ... FROM).
+    """
+    table = Product._meta.db_table
+    # Значення з файлу, якщо воно задане і відрізняється від поточного
+    changed = ' OR '.join(
+        f'(s.{name} IS NOT NULL AND ({table}.{name} IS NULL OR {table}.{name} <> s.{name}))'
+        for name in STOCK_FIELDS
+    )
+    assignments = ', '.join(
+        f'{name} = COALESCE((SELECT s.{name} FROM gir_stock_sync AS s WHERE s.sku = {table}.sku), {name})'
+        for name in STOCK_FIELDS
+    )
+
+    def flush(batch, cursor):
+        cursor.execute('DELETE FROM gir_stock_sync')
+        cursor.executemany(
+            'INSERT INTO gir_stock_sync (sku, stock_quantity, cost_price, wholesale_price) VALUES (%s, %s, %s, %s)',
+            [(sku, *values) for sku, values in batch.items()],
+        )
+        cursor.execute(
+            f'UPDATE {table} SET {assignments}, import_hash = %s, updated_at = %s '
+            f'WHERE EXISTS (SELECT 1 FROM gir_stock_sync AS s WHERE s.sku = {table}.sku AND ({changed}))',
+            ['', timezone.now()],
+        )
+        result.updated += cursor.rowcount
+        cursor.execute(
+            f'SELECT count(*) FROM gir_stock_sync AS s '
+            f'WHERE NOT EXISTS (SELECT 1 FROM {table} AS p WHERE p.sku = s.sku)'
+        )
+        result.not_found += cursor.fetchone()[0]
+        batch.clear()
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS gir_stock_sync')
+        cursor.execute(
+            'CREATE TEMP TABLE gir_stock_sync ('
+            ' sku varchar(100) PRIMARY KEY, stock_quantity integer,'
+            ' cost_price numeric(10, 2), wholesale_price numeric(10, 2))'
+        )
+        batch = {}
+        for sku, *values in records:
+            # Повторний артикул у межах пачки - діє останній рядок
+            batch.pop(sku, None)
+            batch[sku] = values
+            if len(batch) >= GENERIC_BATCH_SIZE:
+                flush(batch, cursor)
+        if batch:
+            flush(batch, cursor)
+        cursor.execute('DROP TABLE gir_stock_sync')
+
+
+def sync_stock(stream):
+    """
+    Оновлює залишки і ціни товарів з текстового потоку CSV.
+
+    Відбиток імпорту оновлених товарів скидається, щоб наступний імпорт
+    кошторису застосував свої значення, а не вважав рядок незмінним.
+    """
+    result = StockSyncResult()
+    records = read_stock_csv(stream, result)
+    if connection.vendor == 'postgresql':
+        _sync_postgresql(records, result)
+    else:
+        _sync_generic(records, result)
+    return result
@@ -0,0 +1,89 @@
+"""
+Завантаження великих Excel файлів частинами з можливістю продовження.
+
+Частини дописуються у файл ``temp_imports/uploads/<id>.part`` приватного
+сховища (gir.storage) прямо з потоку запиту; після останньої частини файл
+під випадковим ім'ям переноситься в ``temp_imports/`` і передається завданню
+імпорту без повторного копіювання.
+"""
+import os
+import re
+import time
+
+from gir.storage import private_storage, random_name
+
+
+UPLOAD_DIR = 'temp_imports/uploads'
+IMPORT_DIR = 'temp_imports'
+
+# Незавершені завантаження, старші за цей час, видаляються
+STALE_UPLOAD_SECONDS = 24 * 60 * 60
+
+UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(Exception):
+    pass
+
+
+class UploadOffsetError(UploadError):
+    """Частина надіслана не з того місця - клієнт має продовжити з ``received``"""
+
+    def __init__(self, received):
+        super().__init__(f'Очікується частина з позиції {received}')
+        self.received = received
+
+
+class ChunkedUpload:
+    """Незавершене завантаження одного файлу (ідентифікатор генерує клієнт)"""
+
+    def __init__(self, upload_id, user_id):
+        if not UPLOAD_ID_RE.match(upload_id or ''):
+            raise UploadError('Некоректний ідентифікатор завантаження')
+        self.upload_id = upload_id
+        # Файли різних користувачів не перетинаються навіть з однаковим id
+        self.part_path = private_storage.path(f'{UPLOAD_DIR}/{user_id}_{upload_id}.part')
+
+    @property
+    def received(self):
+        """Скільки байтів вже отримано"""
+        try:
+            return os.path.getsize(self.part_path)
+        except FileNotFoundError:
+            return 0
+
+    def append(self, offset, chunk):
+        """Дописує частину (UploadedFile) з позиції ``offset``; повертає отриманий розмір"""
+        received = self.received
+        if offset != received:
+            raise UploadOffsetError(received)
+        if offset == 0:
+            os.makedirs(os.path.dirname(self.part_path), exist_ok=True)
+            remove_stale_uploads()
+        with open(self.part_path, 'ab') as f:
+            for data in chunk.chunks():
+                f.write(data)
+        return self.received
+
+    def complete(self, file_name):
+        """
+        Переносить завантажений файл у temp_imports (в межах одного диска -
+        лише перейменування) і повертає ім'я в приватному сховищі для FileField.
+        """
+        if not os.path.exists(self.part_path):
+            raise UploadError('Завантаження не знайдено або вже завершено')
+        name = random_name(IMPORT_DIR, file_name)
+        os.replace(self.part_path, private_storage.path(name))
+        return name
+
+
+def remove_stale_uploads(max_age=STALE_UPLOAD_SECONDS):
+    """Видаляє покинуті незавершені завантаження"""
+    directory = private_storage.path(UPLOAD_DIR)
+    deadline = time.time() - max_age
+    for entry in os.scandir(directory):
+        if entry.name.endswith('.part') and entry.stat().st_mtime < deadline:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,140 @@
+"""
+Вхід користувачів фронтенду.
+
+Перевірка пароля - найдорожча частина запиту (навмисно повільний хеш),
+тому вона виконується в обмеженому пулі потоків процесу: одночасно
+рахується не більше ``FRONTEND_LOGIN_WORKERS`` хешів, ще
+``FRONTEND_LOGIN_QUEUE`` чекають, решта отримує відмову одразу.
+Невдалі спроби рахуються для пари логін+IP і для IP у спільному для
+процесів кеші (``SHARED_CACHE_ALIAS``), тож ліміт діє на весь сервіс і не
+скидається перезапуском; після ліміту запит відхиляється ще до
+хешування, тож перебір паролів не забирає процесор в інших сторінок.
+"""
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import caches
+
+from .hashers import frontend_hasher
+from .models import FrontendUser
+
+
+LOGIN_WORKERS = getattr(settings, 'FRONTEND_LOGIN_WORKERS', 2)
+LOGIN_QUEUE = getattr(settings, 'FRONTEND_LOGIN_QUEUE', 8)
+LOGIN_TIMEOUT = getattr(settings, 'FRONTEND_LOGIN_TIMEOUT', 10)
+
+LOGIN_WINDOW = getattr(settings, 'FRONTEND_LOGIN_WINDOW', 15 * 60)
+MAX_ATTEMPTS = getattr(settings, 'FRONTEND_LOGIN_MAX_ATTEMPTS', 5)
+MAX_IP_ATTEMPTS = getattr(settings, 'FRONTEND_LOGIN_MAX_IP_ATTEMPTS', 30)
+ATTEMPTS_CACHE = getattr(settings, 'SHARED_CACHE_ALIAS', 'default')
+
+_executor = ThreadPoolExecutor(max_workers=LOGIN_WORKERS, thread_name_prefix='frontend-login')
+_slots = threading.BoundedSemaphore(LOGIN_WORKERS + LOGIN_QUEUE)
+
+
+class LoginError(Exception):
+    status = 400
+
+
+class LoginThrottled(LoginError):
+    status = 429
+
+    def __init__(self):
+        super().__init__('Забагато невдалих спроб входу. Спробуйте пізніше')
+
+
+class LoginBusy(LoginError):
+    status = 503
+
+    def __init__(self):
+        super().__init__('Сервер зайнятий, спробуйте увійти ще раз за хвилину')
+
+
+def client_ip(request):
+    """
+    IP клієнта. За проксі (Render) береться остання адреса X-Forwarded-For -
+    її додає сам проксі, тоді як попередні клієнт може підставити.
+    """
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    if forwarded:
+        return forwarded.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _attempt_keys(username, ip):
+    user_digest = hashlib.sha256(f'{username.casefold()}|{ip}'.encode('utf-8')).hexdigest()
+    ip_digest = hashlib.sha256(ip.encode('utf-8')).hexdigest()
+    return f'gir:login:user:{user_digest}', f'gir:login:ip:{ip_digest}'
+
+
+def _register_failure(keys):
+    cache = caches[ATTEMPTS_CACHE]
+    for key in keys:
+        # add не перезаписує лічильник, тож вікно рахується від першої невдачі
+        cache.add(key, 0, LOGIN_WINDOW)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, LOGIN_WINDOW)
+
+
+def _verify(raw_password, encoded):
+    """(пароль вірний, новий хеш або None) - виконується в пулі"""
+    if encoded is None:
+        # Невідомий логін: хешуємо однаково довго, щоб час відповіді не видавав існування користувача
+        make_password(raw_password, hasher=frontend_hasher())
+        return False, None
+    upgraded = []
+    valid = check_password(
+        raw_password, encoded,
+        setter=lambda raw: upgraded.append(make_password(raw, hasher=frontend_hasher())),
+        preferred=frontend_hasher(),
+    )
+    return valid, upgraded[0] if upgraded else None
+
+
+def verify_password(raw_password, encoded):
+    """Перевіряє пароль в обмеженому пулі; LoginBusy, якщо черга заповнена"""
+    if not _slots.acquire(blocking=False):
+        raise LoginBusy()
+    try:
+        future = _executor.submit(_verify, raw_password, encoded)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=LOGIN_TIMEOUT)
+    except TimeoutError:
+        raise LoginBusy()
+
+
+def authenticate_frontend_user(request, username, password):
+    """
+    Активний FrontendUser за логіном і паролем або None.
+
+    Хеш, створений застарілим алгоритмом чи вартістю, після успішного
+    входу замінюється на хеш поточного FRONTEND_PASSWORD_HASHER.
+    """
+    username = (username or '').strip()
+    password = password or ''
+    keys = _attempt_keys(username, client_ip(request))
+    cache = caches[ATTEMPTS_CACHE]
+    user_attempts, ip_attempts = (cache.get(key, 0) for key in keys)
+    if user_attempts >= MAX_ATTEMPTS or ip_attempts >= MAX_IP_ATTEMPTS:
+        raise LoginThrottled()
+
+    user = FrontendUser.objects.filter(username=username, is_active=True).first()
+    valid, upgraded = verify_password(password, user.password if user else None)
+    if not valid:
+        _register_failure(keys)
+        return None
+
+    cache.delete(keys[0])
+    if upgraded:
+        user.password = upgraded
+        user.save(update_fields=['password'])
+    return user
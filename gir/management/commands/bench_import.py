@@ -0,0 +1,224 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import dj_database_url
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from openpyxl import Workbook
+
+from gir.importing.parsing import DEFAULT_FIELD_MAPPING
+
+
+DEFAULT_ROWS = [1000, 10000, 100000]
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'bench' / 'import_baseline.json'
+
+# Показники, зростання яких вважається регресією
+REGRESSION_METRICS = ['seconds', 'queries_per_row', 'peak_rss_mb']
+
+# Кількість різних категорій у синтетичних даних
+BENCH_CATEGORIES = 40
+
+
+def build_workbook(path, rows, sheets):
+    """
+    Синтетична книга з розкладкою колонок як у реальному кошторисі.
+
+    Рядки рівномірно розподілені між вкладками; перед заголовками - рядок
+    з назвою, щоб пошук заголовків працював як на справжньому файлі.
+    """
+    workbook = Workbook(write_only=True)
+    headers = list(DEFAULT_FIELD_MAPPING)
+    per_sheet = -(-rows // sheets)
+    number = 0
+    for sheet_index in range(sheets):
+        worksheet = workbook.create_sheet(f'Номенклатура_{sheet_index + 1}')
+        worksheet.append(['Кошторис (синтетичні дані для бенчмарку)'])
+        worksheet.append(headers)
+        for _ in range(min(per_sheet, rows - number)):
+            cost = round(1 + (number * 37 % 5000) / 7, 2)
+            worksheet.append([
+                f'Категорія {number % BENCH_CATEGORIES}',
+                f'Товар {number} (синтетичний, BENCH)',
+                'шт',
+                cost,
+                round(cost * 1.5, 2),
+                f'BENCH-{number:07d}',
+                number % 6 or None,
+                number % 200,
+                f'https://example.com/product/{number}',
+            ])
+            number += 1
+    workbook.save(path)
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк імпорту товарів на синтетичних Excel файлах (SQLite/PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=DEFAULT_ROWS,
+            help='Розміри файлів у рядках (за замовчуванням 1000 10000 100000)'
+        )
+        parser.add_argument(
+            '--sheets',
+            type=int,
+            default=3,
+            help='Кількість вкладок у кожному файлі'
+        )
+        parser.add_argument(
+            '--database',
+            action='append',
+            default=None,
+            help='DATABASE_URL окремої бази для бенчмарку (можна вказати кілька); '
+                 'база очищується перед кожним прогоном. За замовчуванням - тимчасова SQLite'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Передається в import_products --workers'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Передається в import_products --batch-size'
+        )
+        parser.add_argument(
+            '--workdir',
+            type=str,
+            default=os.path.join(tempfile.gettempdir(), 'gir_bench'),
+            help='Каталог для згенерованих файлів і тимчасових баз'
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            default=str(DEFAULT_BASELINE),
+            help='JSON файл з базовими результатами для порівняння'
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Записати поточні результати як нові базові'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=20.0,
+            help='Допустиме погіршення показника відносно базового, %%'
+        )
+
+    def handle(self, *args, **options):
+        workdir = Path(options['workdir'])
+        workdir.mkdir(parents=True, exist_ok=True)
+        databases = options['database'] or [f'sqlite:///{workdir / "bench.sqlite3"}']
+
+        files = {}
+        for rows in options['rows']:
+            path = workdir / f'bench_{rows}x{options["sheets"]}.xlsx'
+            if not path.exists():
+                self.stdout.write(f'Генеруємо {path.name}...')
+                build_workbook(path, rows, options['sheets'])
+            files[rows] = path
+
+        results = {}
+        for url in databases:
+            backend = dj_database_url.parse(url)['ENGINE'].rsplit('.', 1)[-1]
+            self.stdout.write(f'\n=== {backend} ===')
+            self._manage(url, 'migrate', '--no-input', '-v', '0')
+            for rows, path in files.items():
+                # Перший імпорт у порожню базу і повторний того самого файлу
+                self._manage(url, 'flush', '--no-input')
+                for scenario in ['initial', 'reimport']:
+                    key = f'{backend}/{rows}/{scenario}'
+                    results[key] = self._run_import(url, path, workdir, options)
+                    self._write_result(key, results[key])
+
+        baseline_path = Path(options['baseline'])
+        if baseline_path.exists():
+            with open(baseline_path, encoding='utf-8') as f:
+                baseline = json.load(f)
+            self._compare(results, baseline, options['threshold'])
+
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(baseline_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f'Базові результати збережено: {baseline_path}'))
+
+    def _manage(self, url, *command):
+        """Запускає manage.py в окремому процесі з вказаною базою"""
+        env = dict(os.environ, DATABASE_URL=url)
+        completed = subprocess.run(
+            [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), *command],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f'{" ".join(command[:1])}: {completed.stderr.strip()[-2000:]}')
+
+    def _run_import(self, url, path, workdir, options):
+        """
+        Один прогін import_products; окремий процес - щоб пікова пам'ять
+        і час відкриття файлу не залежали від попередніх прогонів.
+        """
+        metrics_path = workdir / 'metrics.json'
+        command = [
+            'import_products', '--file', str(path), '--force',
+            '--workers', str(options['workers']), '--metrics', str(metrics_path),
+        ]
+        if options['batch_size']:
+            command += ['--batch-size', str(options['batch_size'])]
+        self._manage(url, *command)
+
+        with open(metrics_path, encoding='utf-8') as f:
+            summary = json.load(f)
+        return {
+            'rows': summary['stats']['rows'],
+            'seconds': summary['seconds'],
+            'rows_per_second': summary['rows_per_second'],
+            'queries_per_row': summary['queries_per_row'],
+            'peak_rss_mb': summary['peak_rss_mb'],
+            'phases': summary['phases'],
+        }
+
+    def _write_result(self, key, result):
+        self.stdout.write(
+            f'{key:<32} {result["seconds"]:>9.2f} с  {result["rows_per_second"]:>9.1f} рядків/с  '
+            f'{result["queries_per_row"]:>7.4f} запитів/рядок  {result["peak_rss_mb"]} МБ'
+        )
+
+    def _compare(self, results, baseline, threshold):
+        """Порівнює результати з базовими і виводить погіршення понад поріг"""
+        self.stdout.write('\nПорівняння з базовими результатами:')
+        regressions = 0
+        for key, result in results.items():
+            base = baseline.get(key)
+            if not base:
+                continue
+            for metric in REGRESSION_METRICS:
+                old, new = base.get(metric), result.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old * 100
+                line = f'  {key} {metric}: {old} → {new} ({change:+.1f}%)'
+                if change > threshold:
+                    regressions += 1
+                    self.stdout.write(self.style.ERROR(line))
+                else:
+                    self.stdout.write(line)
+
+        if regressions:
+            self.stdout.write(self.style.ERROR(f'Погіршень понад {threshold}%: {regressions}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Погіршень не виявлено'))
@@ -1,8 +1,21 @@
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from openpyxl import load_workbook
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+import cProfile
+import json
+import multiprocessing
 import os
-from gir.models import Category, Product
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from gir.importing.engine import DEFAULT_BATCH_SIZE, ImportStats, ProductImporter
+from gir.importing.errors import open_errors
+from gir.importing.metrics import ImportMetrics
+from gir.importing.parsing import CompiledTemplate, has_required_columns, parse_rows, parse_sheet
+from gir.importing.report import open_report
+from gir.importing.reader import file_digest, iter_rows, open_workbook, select_sheets
+from gir.models import ImportCheckpoint, ImportedFile, ImportJob, ImportLayout, ImportTemplate
+from gir.storage import private_storage
 
 
 class Command(BaseCommand):
@@ -21,10 +34,90 @@ class Command(BaseCommand):
             default=None,
             help='Список вкладок для обробки (якщо не вказано - обробляємо всі)'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Кількість рядків, що записуються в базу однією пачкою'
+        )
+        parser.add_argument(
+            '--job',
+            type=int,
+            default=None,
+            help='ID завдання імпорту (ImportJob), в яке записується прогрес'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Кількість процесів для паралельного розбору вкладок (лише для файлу на диску). '
+                 'Кожна вкладка повертається записувачу цілком, тож пам\'ять зростає з розміром '
+                 'найбільшої вкладки, а не обмежена однією пачкою, як при --workers 1'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Імпортувати повторно, навіть якщо цей файл вже імпортувався з тими ж параметрами'
+        )
+        parser.add_argument(
+            '--template',
+            type=int,
+            default=None,
+            help='ID шаблону імпорту (ImportTemplate) з маппінгом колонок'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ігнорувати контрольні точки перерваного імпорту і почати з першого рядка'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Лише показати, що буде створено та змінено, без запису в базу'
+        )
+        parser.add_argument(
+            '--report',
+            type=str,
+            default=None,
+            help='Файл звіту змін (.csv або .jsonl); для --dry-run з --job створюється автоматично'
+        )
+        parser.add_argument(
+            '--errors',
+            type=str,
+            default=None,
+            help='Файл рядків з помилками (.xlsx або .csv); для --job створюється автоматично'
+        )
+        parser.add_argument(
+            '--metrics',
+            type=str,
+            default=None,
+            help='Зберегти JSON з метриками імпорту (час фаз, запити, рядків/с) у файл'
+        )
+        parser.add_argument(
+            '--profile',
+            type=str,
+            default=None,
+            help='Запустити імпорт під cProfile і зберегти статистику у файл (pstats)'
+        )
 
     def handle(self, *args, **options):
         file_path = options['file']
-        specific_sheets = options['sheets']
+        self.job = ImportJob.objects.get(pk=options['job']) if options['job'] else None
+        
+        # Шаблон імпорту компілюється один раз на весь файл
+        self.template_id = options['template'] or (self.job.import_template_id if self.job else None)
+        import_template = None
+        if self.template_id:
+            import_template = ImportTemplate.objects.filter(pk=self.template_id).first()
+            if import_template is None:
+                self.stdout.write(
+                    self.style.ERROR(f'Шаблон імпорту не знайдено: {self.template_id}')
+                )
+                self._finish_job(error=f'Шаблон імпорту не знайдено: {self.template_id}')
+                return
+            self.stdout.write(f'Шаблон імпорту: {import_template.name}')
+        self.template = CompiledTemplate.from_template(import_template)
+        specific_sheets = options['sheets'] or self.template.sheets or None
         
         # Перевіряємо чи це файл в пам'яті (BytesIO) або шлях до файлу
         if hasattr(file_path, 'read'):
@@ -37,258 +130,388 @@ class Command(BaseCommand):
                 self.stdout.write(
                     self.style.ERROR(f'Файл не знайдено: {file_path}')
                 )
+                self._finish_job(error=f'Файл не знайдено: {file_path}')
                 return
             excel_file = file_path
             self.stdout.write(f'Завантажую файл: {file_path}')
         
+        # Той самий файл з тими ж параметрами вже імпортувався - повертаємо збережений результат
+        self.digest = file_digest(excel_file)
+        if not options['force'] and not options['dry_run'] and self._use_cached_result(specific_sheets):
+            return
+        
+        self.metrics = ImportMetrics()
+        profiler = cProfile.Profile() if options['profile'] else None
         try:
-            # Завантажуємо Excel
-            workbook = load_workbook(excel_file, data_only=True)
-            
-            # Визначаємо які вкладки обробляти
-            if specific_sheets:
-                sheets_to_process = [s for s in specific_sheets if s in workbook.sheetnames]
-                if not sheets_to_process:
-                    self.stdout.write(
-                        self.style.ERROR(f'Жодної з вказаних вкладок не знайдено: {specific_sheets}')
-                    )
-                    return
-            else:
-                # Обробляємо всі вкладки, крім системних
-                sheets_to_process = [s for s in workbook.sheetnames if not self._is_system_sheet(s)]
-            
-            self.stdout.write(f'Вкладки для обробки: {sheets_to_process}')
-            
-            total_created = 0
-            total_categories = 0
-            
-            # Обробляємо кожну вкладку
-            for sheet_name in sheets_to_process:
-                self.stdout.write(f'\n{"="*50}')
-                self.stdout.write(f'Обробляю вкладку: {sheet_name}')
-                self.stdout.write(f'{"="*50}')
-                
-                sheet_created, sheet_categories = self._process_sheet(workbook[sheet_name], sheet_name)
-                total_created += sheet_created
-                total_categories += sheet_categories
-            
-            self.stdout.write(f'\n{"="*50}')
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'Імпорт завершено! Загалом створено: {total_created} товарів, {total_categories} категорій'
-                )
-            )
-            self.stdout.write(f'{"="*50}')
+            with self.metrics.count_queries():
+                if profiler is not None:
+                    profiler.enable()
+                # Відкриваємо Excel у потоковому режимі: значення читаються рядок
+                # за рядком, системні вкладки взагалі не розбираються
+                started = perf_counter()
+                with open_workbook(excel_file) as workbook:
+                    self.metrics.add('open', perf_counter() - started)
+                    self._import_workbook(workbook, excel_file, specific_sheets, options)
             
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'Помилка імпорту: {e}')
             )
+            self._finish_job(error=f'Помилка імпорту: {e}')
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(options['profile'])
+                self.stdout.write(f'Профіль cProfile збережено: {options["profile"]}')
+    
+    def _use_cached_result(self, specific_sheets):
+        """Якщо файл вже імпортувався, виводить збережений результат замість імпорту"""
+        imported = ImportedFile.objects.filter(
+            sha256=self.digest,
+            import_template_id=self.template_id,
+            sheets=ImportedFile.sheets_key(specific_sheets),
+        ).first()
+        if imported is None:
+            return False
+        
+        stats = ImportStats(
+            rows=imported.rows,
+            created=imported.created_count,
+            updated=imported.updated_count,
+            unchanged=imported.unchanged_count,
+            categories=imported.categories_count,
+            errors=imported.error_count,
+        )
+        message = (
+            f'Файл вже імпортовано {timezone.localtime(imported.imported_at):%d.%m.%Y %H:%M}, '
+            f'показано збережений результат (використайте --force для повторного імпорту)'
+        )
+        self.stdout.write(self.style.WARNING(message))
+        self.stdout.write(
+            f'Створено: {stats.created} товарів, оновлено: {stats.updated}, без змін: {stats.unchanged}, '
+            f'категорій: {stats.categories}, помилок: {stats.errors}'
+        )
+        if self.job and imported.errors_file:
+            self.job.errors_file.name = imported.errors_file.name
+            self.job.save(update_fields=['errors_file'])
+        self._finish_job(stats=stats, message=message)
+        return True
     
-    def _is_system_sheet(self, sheet_name):
-        """Перевіряє чи є вкладка системною"""
-        system_sheets = [
-            'Зміст', 'Титул', 'Зміст_2', 'Титул_2',
-            'Кошторис', 'Кошторис_2', 'Кошторис_3',
-            'Відомість', 'Відомість_2', 'Відомість_3',
-            'Сума', 'Сума_2', 'Сума_3',
-            'Копія аркуша', 'ТЕХ_ЛИСТ', 'ТЗ', 'Розрахунок',
-            'Вартість монтажу', 'Показники', 'Довідкові дані',
-            'Інструкції', 'РЕЗЕРВ аркуша', 'Прайс'
-        ]
-        return any(sys_name.lower() in sheet_name.lower() for sys_name in system_sheets)
+    def _remember_result(self, specific_sheets, file_name, stats, errors_file=''):
+        ImportedFile.objects.update_or_create(
+            sha256=self.digest,
+            import_template_id=self.template_id,
+            sheets=ImportedFile.sheets_key(specific_sheets),
+            defaults={
+                'file_name': file_name,
+                'rows': stats.rows,
+                'created_count': stats.created,
+                'updated_count': stats.updated,
+                'unchanged_count': stats.unchanged,
+                'categories_count': stats.categories,
+                'error_count': stats.errors,
+                'errors_file': errors_file,
+                'imported_at': timezone.now(),
+            },
+        )
     
-    def _process_sheet(self, worksheet, sheet_name):
-        """Обробляє одну вкладку Excel"""
-        created_count = 0
-        categories_count = 0
+    def _load_layouts(self):
+        """Відомі розкладки колонок {відбиток: {'row': ..., 'columns': ...}}"""
+        return {
+            layout.fingerprint: {'row': layout.header_row, 'columns': layout.columns}
+            for layout in ImportLayout.objects.only('fingerprint', 'header_row', 'columns')
+        }
+    
+    def _remember_layout(self, layout):
+        """Зберігає нову розкладку вкладки в кеш або відмічає використання відомої"""
+        if not self.save_layouts or not layout.fingerprint or not has_required_columns(layout.columns):
+            return
+        if layout.cached:
+            ImportLayout.objects.filter(fingerprint=layout.fingerprint).update(
+                hits=F('hits') + 1, last_used_at=timezone.now()
+            )
+            return
+        ImportLayout.objects.get_or_create(
+            fingerprint=layout.fingerprint,
+            defaults={
+                'header_row': layout.header_row,
+                'headers': [str(header) for header in layout.headers],
+                'columns': layout.columns,
+            },
+        )
+        self.template.layouts[layout.fingerprint] = {'row': layout.header_row, 'columns': layout.columns}
+    
+    def _checkpoint_queryset(self):
+        return ImportCheckpoint.objects.filter(sha256=self.digest, import_template_id=self.template_id)
+    
+    def _save_checkpoint(self, sheet_name, last_row):
+        """Викликається в транзакції пачки: рядки до last_row включно вже в базі"""
+        updated = self._checkpoint_queryset().filter(sheet=sheet_name).update(
+            last_row=last_row, updated_at=timezone.now()
+        )
+        if not updated:
+            ImportCheckpoint.objects.create(
+                sha256=self.digest, import_template_id=self.template_id, sheet=sheet_name, last_row=last_row
+            )
+    
+    def _start_row(self, sheet_name):
+        """Перший рядок для обробки: після контрольної точки перерваного імпорту"""
+        last_row = self.checkpoints.get(sheet_name)
+        if last_row is None:
+            return None
+        self.stdout.write(f'Продовжуємо перерваний імпорт вкладки {sheet_name} з рядка {last_row + 1}')
+        return last_row + 1
+    
+    def _finish_job(self, stats=None, error=None, message='', metrics=None):
+        """Фіксує результат у завданні імпорту, якщо команду запущено для нього"""
+        if self.job is None or self.job.is_finished:
+            return
+        if stats is not None:
+            self.job.update_progress(stats)
+        self.job.status = ImportJob.STATUS_FAILED if error else ImportJob.STATUS_DONE
+        self.job.message = error or message
+        self.job.finished_at = timezone.now()
+        update_fields = ['status', 'message', 'finished_at']
+        if metrics is not None:
+            self.job.metrics = metrics
+            update_fields.append('metrics')
+        self.job.save(update_fields=update_fields)
+    
+    def _import_workbook(self, workbook, source, specific_sheets, options):
+        """Імпортує вибрані вкладки відкритої книги"""
+        sheets_to_process = select_sheets(workbook, specific_sheets)
+        if specific_sheets and not sheets_to_process:
+            self.stdout.write(
+                self.style.ERROR(f'Жодної з вказаних вкладок не знайдено: {specific_sheets}')
+            )
+            self._finish_job(error=f'Жодної з вказаних вкладок не знайдено: {specific_sheets}')
+            return
+        
+        self.stdout.write(f'Вкладки для обробки: {sheets_to_process}')
+        
+        dry_run = options['dry_run']
+        # Вкладки, обробку яких перервала помилка: імпорт не вважається завершеним
+        self.failed_sheets = []
+        self.template.layouts = self._load_layouts()
+        self.save_layouts = not dry_run
+        
+        # Перерваний імпорт цього файлу продовжується з останньої записаної пачки
+        self.checkpoints = {}
+        if not dry_run:
+            if options['restart']:
+                self._checkpoint_queryset().delete()
+            else:
+                self.checkpoints = dict(self._checkpoint_queryset().values_list('sheet', 'last_row'))
+            if connection.in_atomic_block:
+                self.stdout.write(self.style.WARNING(
+                    'Імпорт запущено всередині транзакції: пачки не будуть закомічені окремо'
+                ))
+        report_path = options['report']
+        if dry_run and not report_path and self.job:
+            report_path = private_storage.path(f'import_reports/job_{self.job.pk}.csv')
+        
+        report, report_file = (None, None)
+        if report_path:
+            report, report_file = open_report(report_path)
+            self.stdout.write(f'Звіт змін: {report_path}')
+        
+        # Рядки з помилками - у файл з тими ж заголовками, щоб після виправлення
+        # його можна було імпортувати повторно
+        errors_path = options['errors']
+        if not errors_path and self.job:
+            errors_path = private_storage.path(f'import_errors/job_{self.job.pk}.xlsx')
+        errors = open_errors(errors_path) if errors_path else None
+        
+        importer = ProductImporter(
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+            progress=self.job.update_progress if self.job else None,
+            create_categories=self.template.create_categories,
+            dry_run=dry_run,
+            report=report,
+            metrics=self.metrics,
+            verbose_log=self.stdout.write if options['verbosity'] >= 2 else None,
+            errors=errors,
+            checkpoint=self._save_checkpoint,
+        )
         
         try:
-            # Знаходимо заголовки
-            headers = self._find_headers(worksheet)
-            if not headers:
-                self.stdout.write(f'Заголовки не знайдено у вкладці {sheet_name}')
-                return 0, 0
-            
-            self.stdout.write(f'Знайдені заголовки: {headers}')
-            
-            # Маппінг полів Excel → Django
-            field_mapping = {
-                'Категорія': 'category',
-                'Найменування': 'title',
-                'Од.вим': 'unit',
-                'Облікова ціна б.г. з ПДВ $': 'cost_price',
-                'Гуртова ціна з ПДВ, авт% $': 'wholesale_price',
-                'Артикул': 'sku',
-                'Кількість модулів': 'modules_count',
-                'Вільно на складі': 'stock_quantity',
-                'Посилання': 'external_link'
+            workers = options['workers']
+            if workers > 1 and len(sheets_to_process) > 1 and not hasattr(source, 'read'):
+                self._import_parallel(source, sheets_to_process, importer, workers)
+            else:
+                # Обробляємо кожну вкладку
+                for sheet_name in sheets_to_process:
+                    self._write_sheet_header(sheet_name)
+                    self._process_sheet(workbook[sheet_name], sheet_name, importer)
+        finally:
+            if report_file is not None:
+                report_file.close()
+            if errors is not None:
+                errors.close()
+        
+        total = importer.stats
+        totals = (
+            f'Загалом {"буде " if dry_run else ""}створено: {total.created} товарів, '
+            f'оновлено: {total.updated}, без змін: {total.unchanged}, '
+            f'категорій: {total.categories}, помилок: {total.errors}'
+        )
+        error = None
+        if self.failed_sheets:
+            error = (
+                f'{"Перевірку (dry-run)" if dry_run else "Імпорт"} перервано: помилка обробки вкладок '
+                f'{", ".join(self.failed_sheets)}. {totals}'
+            )
+            if not dry_run:
+                error += '. Записані пачки збережено, повторний запуск продовжить з контрольної точки'
+        self.stdout.write(f'\n{"="*50}')
+        if error:
+            self.stdout.write(self.style.ERROR(error))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f'{"Перевірку (dry-run)" if dry_run else "Імпорт"} завершено! {totals}')
+            )
+        self.stdout.write(f'{"="*50}')
+        errors_name = ''
+        if errors is not None and errors.count:
+            self.stdout.write(f'Рядки з помилками збережено: {errors_path}')
+            if self.job:
+                errors_name = os.path.relpath(errors_path, private_storage.location)
+                self.job.errors_file.name = errors_name
+                self.job.save(update_fields=['errors_file'])
+        if dry_run:
+            if self.job and report_path:
+                self.job.report.name = os.path.relpath(report_path, private_storage.location)
+                self.job.save(update_fields=['report'])
+        elif error is None:
+            # Незавершений імпорт не запам'ятовується, інакше повторне
+            # завантаження файлу отримало б збережений результат замість продовження
+            self._remember_result(
+                specific_sheets, os.path.basename(getattr(source, 'name', source)), total, errors_name
+            )
+        
+        # Структурований підсумок: час фаз, запити до бази, швидкість по вкладках
+        summary = self.metrics.summary(
+            total,
+            file=os.path.basename(getattr(source, 'name', source)),
+            dry_run=dry_run,
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+        )
+        summary_json = json.dumps(summary, ensure_ascii=False, indent=2)
+        self.stdout.write(summary_json)
+        if options['metrics']:
+            with open(options['metrics'], 'w', encoding='utf-8') as f:
+                f.write(summary_json)
+        self._finish_job(stats=total, error=error, metrics=summary)
+    
+    def _import_parallel(self, source, sheets_to_process, importer, workers):
+        """
+        Розбирає вкладки в пулі процесів, а записує їх в базу в поточному процесі.
+        
+        Процеси пулу лише читають файл і нормалізують рядки; кожна готова
+        вкладка одразу передається єдиному записувачу, поки інші ще розбираються.
+        """
+        self.stdout.write(f'Паралельний розбір вкладок: {workers} процесів')
+        
+        # spawn: дочірні процеси не успадковують відкриті з'єднання з базою,
+        # parse_sheet працює без Django
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = {
+                executor.submit(
+                    parse_sheet, source, sheet_name, self.template, self._start_row(sheet_name)
+                ): sheet_name
+                for sheet_name in sheets_to_process
             }
-            
-            # Знаходимо індекси колонок
-            column_indices = {}
-            for i, header in enumerate(headers):
-                for excel_field, django_field in field_mapping.items():
-                    if excel_field in str(header):
-                        column_indices[django_field] = i
-                        break
-            
-            self.stdout.write(f'Маппінг колонок: {column_indices}')
-            
-            # Перевіряємо чи є обов'язкові поля
-            if 'category' not in column_indices or 'title' not in column_indices:
-                self.stdout.write(f'У вкладці {sheet_name} відсутні обов\'язкові поля (Категорія або Найменування)')
-                return 0, 0
-            
-            # Імпортуємо дані
-            for row_num, row in enumerate(worksheet.iter_rows(min_row=2), start=2):
+            for future in as_completed(futures):
+                sheet_name = futures[future]
+                self._write_sheet_header(sheet_name)
+                self.metrics.start_sheet(sheet_name, importer.stats)
                 try:
-                    # Отримуємо значення з рядка
-                    row_data = {}
-                    for field, col_idx in column_indices.items():
-                        if col_idx < len(row):
-                            value = row[col_idx].value
-                            row_data[field] = value
-                    
-                    # Перевіряємо обов'язкові поля
-                    if not row_data.get('title') or not row_data.get('category'):
-                        continue
-                    
-                    # Створюємо або отримуємо категорію
-                    category_name = str(row_data['category']).strip()
-                    if not category_name:
-                        continue
-                        
-                    category, created = Category.objects.get_or_create(
-                        name=category_name,
-                        defaults={
-                            'slug': self._generate_slug(category_name),
-                            'is_active': True
-                        }
-                    )
-                    
-                    if created:
-                        categories_count += 1
-                        self.stdout.write(f'Створено категорію: {category_name}')
-                    
-                    # Перевіряємо чи існує товар
-                    product_title = str(row_data['title']).strip()
-                    product_sku = str(row_data.get('sku', '')).strip()
-                    
-                    # Шукаємо по артикулу або назві
-                    existing_product = None
-                    if product_sku:
-                        existing_product = Product.objects.filter(sku=product_sku).first()
-                    
-                    if not existing_product and product_title:
-                        existing_product = Product.objects.filter(title=product_title).first()
-                    
-                    # Підготовляємо дані для товара
-                    product_data = {
-                        'category': category,
-                        'title': product_title,
-                        'unit': str(row_data.get('unit', '')).strip(),
-                        'sku': product_sku,
-                        'modules_count': self._parse_int(row_data.get('modules_count')),
-                        'stock_quantity': self._parse_int(row_data.get('stock_quantity'), default=0),
-                        'external_link': str(row_data.get('external_link', '')).strip(),
-                        'is_active': True
-                    }
-                    
-                    # Обробляємо ціни
-                    if row_data.get('cost_price'):
-                        product_data['cost_price'] = self._parse_decimal(row_data['cost_price'])
-                    
-                    if row_data.get('wholesale_price'):
-                        product_data['wholesale_price'] = self._parse_decimal(row_data['wholesale_price'])
-                    
-                    if existing_product:
-                        # Оновлюємо існуючий товар
-                        for field, value in product_data.items():
-                            if value is not None and value != '':
-                                setattr(existing_product, field, value)
-                        existing_product.save()
-                        self.stdout.write(f'Оновлено товар: {product_title}')
-                    else:
-                        # Створюємо новий товар
-                        product = Product.objects.create(**product_data)
-                        created_count += 1
-                        self.stdout.write(f'Створено товар: {product_title}')
-                    
-                    if row_num % 100 == 0:
-                        self.stdout.write(f'Оброблено {row_num} рядків...')
-                        
+                    parsed = future.result()
+                    self.metrics.add('parse', parsed.seconds)
+                    importer.begin_sheet(sheet_name, parsed.layout)
+                    if self._check_layout(sheet_name, parsed.layout):
+                        for row_num, error, values in parsed.errors:
+                            importer.add_error(row_num, error, values=values)
+                        for row_num, data in parsed.rows:
+                            importer.add(row_num, data)
+                        importer.flush()
+                        if not importer.dry_run:
+                            self._checkpoint_queryset().filter(sheet=sheet_name).delete()
                 except Exception as e:
+                    self.failed_sheets.append(sheet_name)
                     self.stdout.write(
-                        self.style.WARNING(f'Помилка в рядку {row_num}: {e}')
+                        self.style.ERROR(f'Помилка обробки вкладки {sheet_name}: {e}')
                     )
-                    continue
-            
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'Вкладка {sheet_name}: створено {created_count} товарів, {categories_count} категорій'
-                )
+                self._write_sheet_summary(sheet_name, self.metrics.finish_sheet(importer.stats))
+    
+    def _write_sheet_header(self, sheet_name):
+        self.stdout.write(f'\n{"="*50}')
+        self.stdout.write(f'Обробляю вкладку: {sheet_name}')
+        self.stdout.write(f'{"="*50}')
+    
+    def _write_sheet_summary(self, sheet_name, sheet_stats):
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Вкладка {sheet_name}: створено {sheet_stats.created} товарів, '
+                f'оновлено {sheet_stats.updated}, без змін {sheet_stats.unchanged}, '
+                f'{sheet_stats.categories} категорій'
             )
-            
-            return created_count, categories_count
+        )
+    
+    def _check_layout(self, sheet_name, layout):
+        """Перевіряє знайдені заголовки і наявність обов'язкових колонок"""
+        if not layout.headers:
+            self.stdout.write(f'Заголовки не знайдено у вкладці {sheet_name}')
+            return False
+        
+        if layout.cached:
+            self.stdout.write(f'Відома розкладка колонок (рядок заголовків {layout.header_row})')
+        else:
+            self.stdout.write(f'Знайдені заголовки: {layout.headers}')
+        self.stdout.write(f'Маппінг колонок: {layout.columns}')
+        
+        # Перевіряємо чи є обов'язкові поля
+        if not has_required_columns(layout.columns):
+            self.stdout.write(f'У вкладці {sheet_name} відсутні обов\'язкові поля (Категорія або Найменування)')
+            return False
+        self._remember_layout(layout)
+        return True
+    
+    def _process_sheet(self, worksheet, sheet_name, importer):
+        """Обробляє одну вкладку Excel"""
+        self.metrics.start_sheet(sheet_name, importer.stats)
+        
+        try:
+            # Знаходимо заголовки (або беремо відому розкладку з кешу)
+            with self.metrics.phase('headers'):
+                layout = self.template.detect_layout(worksheet)
+                transformer = self.template.compile(layout.columns)
+            importer.begin_sheet(sheet_name, layout)
+            if self._check_layout(sheet_name, layout):
+                # Готуємо рядки і передаємо їх на пакетний запис
+                start_row = max(layout.data_row, self._start_row(sheet_name) or 0)
+                rows = iter_rows(worksheet, min_row=start_row)
+                rows = self.metrics.timed(parse_rows(rows, transformer), 'parse')
+                for row_num, data, values, error in rows:
+                    if error is not None:
+                        importer.add_error(row_num, error, values=values)
+                    if data is not None:
+                        importer.add(row_num, data)
+                
+                importer.flush()
+                # Вкладку оброблено повністю - контрольна точка більше не потрібна
+                if not importer.dry_run:
+                    self._checkpoint_queryset().filter(sheet=sheet_name).delete()
             
         except Exception as e:
+            self.failed_sheets.append(sheet_name)
             self.stdout.write(
                 self.style.ERROR(f'Помилка обробки вкладки {sheet_name}: {e}')
             )
-            return 0, 0
-    
-    def _find_headers(self, worksheet):
-        """Знаходить заголовки у вкладці"""
-        headers = []
-        for row in worksheet.iter_rows(min_row=1, max_row=20):  # Шукаємо в перших 20 рядках
-            for cell in row:
-                if cell.value:
-                    headers.append(cell.value)
-                else:
-                    headers.append('')
-            # Перевіряємо чи є заголовок "Категорія"
-            if any('Категорія' in str(h) for h in headers):
-                return headers
-        return []
-    
-    def _generate_slug(self, name):
-        """Генерує slug з назви категорії"""
-        import re
-        # Транслітерація українських літер
-        translit_map = {
-            'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e', 'є': 'ye',
-            'ж': 'zh', 'з': 'z', 'и': 'y', 'і': 'i', 'ї': 'yi', 'й': 'y', 'к': 'k', 'л': 'l',
-            'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
-            'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ь': '',
-            'ю': 'yu', 'я': 'ya'
-        }
-        
-        # Транслітеруємо
-        slug = name.lower()
-        for ukr, eng in translit_map.items():
-            slug = slug.replace(ukr, eng)
         
-        # Замінюємо пробіли та спецсимволи на дефіси
-        slug = re.sub(r'[^a-z0-9]+', '-', slug)
-        slug = re.sub(r'^-+|-+$', '', slug)  # Прибираємо дефіси з початку та кінця
-        
-        return slug
-    
-    def _parse_int(self, value, default=None):
-        """Парсинг цілого числа"""
-        if value is None:
-            return default
-        try:
-            return int(float(value))
-        except (ValueError, TypeError):
-            return default
-    
-    def _parse_decimal(self, value):
-        """Парсинг десяткового числа"""
-        if value is None:
-            return None
-        try:
-            return float(value)
-        except (ValueError, TypeError):
-            return None
+        sheet_stats = self.metrics.finish_sheet(importer.stats)
+        self._write_sheet_summary(sheet_name, sheet_stats)
+        return sheet_stats
@@ -0,0 +1,159 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from gir.models import ImportJob
+
+
+# Скільки останніх символів виводу імпорту зберігаємо в журналі завдання
+LOG_TAIL_CHARS = 20000
+
+# Як часто обробник оновлює ImportJob.heartbeat_at завдання, яке виконує
+HEARTBEAT_SECONDS = 30
+
+# Завдання без оновлень довше за цей час вважається перерваним
+STALE_AFTER_SECONDS = 5 * 60
+
+
+@contextmanager
+def heartbeat(job_id, interval=HEARTBEAT_SECONDS):
+    """
+    Поки виконується блок, окремий потік раз на ``interval`` секунд оновлює
+    heartbeat_at завдання - навіть коли одна пачка чи вкладка обробляється довго.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                try:
+                    ImportJob.objects.filter(pk=job_id, status=ImportJob.STATUS_RUNNING).update(
+                        heartbeat_at=timezone.now()
+                    )
+                except DatabaseError:
+                    pass
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f'import-heartbeat-{job_id}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def requeue_stale_jobs(stale_after=STALE_AFTER_SECONDS):
+    """
+    Повертає в чергу завдання, чий обробник не подавав ознак життя довше
+    за ``stale_after`` секунд (процес зупинено або він завис). Завдання,
+    які ще виконує інший живий обробник (наприклад, старий екземпляр під
+    час розгортання), не чіпаються. Імпорт продовжиться з контрольної точки.
+    """
+    deadline = timezone.now() - timedelta(seconds=stale_after)
+    return ImportJob.objects.filter(
+        Q(heartbeat_at__lt=deadline) | Q(heartbeat_at__isnull=True, started_at__lt=deadline),
+        status=ImportJob.STATUS_RUNNING,
+    ).update(status=ImportJob.STATUS_PENDING)
+
+
+class Command(BaseCommand):
+    help = 'Фоновий обробник черги імпорту товарів (ImportJob)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Інтервал опитування черги, секунд'
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=float,
+            default=STALE_AFTER_SECONDS,
+            help='Через скільки секунд без ознак життя обробника завдання повертається в чергу '
+                 '(імпорт продовжиться з контрольної точки)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обробити завдання, що вже в черзі, і завершити роботу'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Обробник імпорту запущено')
+        while True:
+            try:
+                close_old_connections()
+                # Перевіряється на кожному опитуванні: обробник, що зупинився під час
+                # розгортання, перестає оновлювати мітку вже після старту нового
+                requeued = requeue_stale_jobs(options['stale_after'])
+                if requeued:
+                    self.stdout.write(f'Повернуто в чергу перерваних завдань: {requeued}')
+                job = self._claim_next_job()
+                if job is not None:
+                    self._run_job(job)
+                    continue
+            except DatabaseError as e:
+                # База тимчасово недоступна: обробник не завершується (його ніхто
+                # не перезапустить), а повторює спробу після паузи
+                if options['once']:
+                    raise
+                self.stderr.write(f'Помилка бази даних: {e}; повтор через {options["interval"]} с')
+            else:
+                if options['once']:
+                    break
+            time.sleep(options['interval'])
+
+    def _claim_next_job(self):
+        """Забирає найстаріше завдання з черги (безпечно для кількох обробників)"""
+        with transaction.atomic():
+            job = (
+                ImportJob.objects
+                .select_for_update(skip_locked=True)
+                .filter(status=ImportJob.STATUS_PENDING)
+                .order_by('created_at')
+                .first()
+            )
+            if job is None:
+                return None
+            job.status = ImportJob.STATUS_RUNNING
+            job.started_at = job.heartbeat_at = timezone.now()
+            job.save(update_fields=['status', 'started_at', 'heartbeat_at'])
+        return job
+
+    def _run_job(self, job):
+        self.stdout.write(f'Завдання #{job.pk}: {job.original_name}')
+        output = StringIO()
+        try:
+            with heartbeat(job.pk):
+                call_command(
+                    'import_products',
+                    file=job.file.path,
+                    sheets=job.sheets or None,
+                    job=job.pk,
+                    force=job.force,
+                    dry_run=job.dry_run,
+                    template=job.import_template_id,
+                    stdout=output,
+                )
+        except Exception as e:
+            output.write(f'Помилка імпорту: {e}\n')
+            ImportJob.objects.filter(pk=job.pk, status=ImportJob.STATUS_RUNNING).update(
+                status=ImportJob.STATUS_FAILED,
+                message=f'Помилка імпорту: {e}',
+                finished_at=timezone.now(),
+            )
+
+        ImportJob.objects.filter(pk=job.pk).update(log=output.getvalue()[-LOG_TAIL_CHARS:])
+        job.refresh_from_db()
+        self.stdout.write(f'Завдання #{job.pk}: {job.get_status_display()}')
@@ -0,0 +1,40 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gir.importing.stock import sync_stock
+
+
+class Command(BaseCommand):
+    help = 'Оновлення залишків і цін товарів з CSV за артикулом (без повного імпорту кошторису)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            type=str,
+            required=True,
+            help='CSV з колонками "Артикул" і хоча б однією з: "Вільно на складі", '
+                 'облікова або гуртова ціна (або назви полів sku, stock_quantity, cost_price, wholesale_price)'
+        )
+        parser.add_argument(
+            '--encoding',
+            type=str,
+            default='utf-8-sig',
+            help='Кодування файлу'
+        )
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        try:
+            with open(options['file'], encoding=options['encoding'], newline='') as stream:
+                result = sync_stock(stream)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Помилка синхронізації: {e}')
+
+        for row_num, error in result.errors:
+            self.stdout.write(f'Помилка в рядку {row_num}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Синхронізацію завершено за {perf_counter() - started:.2f} с: рядків {result.rows}, '
+            f'оновлено товарів {result.updated}, не знайдено артикулів {result.not_found}, '
+            f'помилок {len(result.errors)}'
+        ))
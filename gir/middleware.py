@@ -0,0 +1,65 @@
+"""
+Поточний користувач фронтенду як ``request.frontend_user``.
+
+Користувач завантажується ліниво, не більше одного разу за запит, і
+кешується за id на ``FRONTEND_USER_CACHE_TIMEOUT`` секунд у спільному для
+процесів кеші (``SHARED_CACHE_ALIAS``). Збереження, деактивація або
+видалення FrontendUser скидає кеш (gir.signals) для всіх процесів одразу
+після коміту транзакції.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject
+
+from .models import FrontendUser
+
+
+FRONTEND_USER_CACHE_TIMEOUT = getattr(settings, 'FRONTEND_USER_CACHE_TIMEOUT', 60)
+FRONTEND_USER_CACHE = getattr(settings, 'SHARED_CACHE_ALIAS', 'default')
+
+SESSION_KEYS = ('frontend_user_id', 'frontend_username')
+
+
+def frontend_user_cache_key(user_id):
+    return f'gir:frontend_user:{user_id}'
+
+
+def load_frontend_user(user_id):
+    """Активний користувач за id: з кешу або одним запитом"""
+    user = caches[FRONTEND_USER_CACHE].get(frontend_user_cache_key(user_id))
+    if user is None:
+        user = FrontendUser.objects.filter(id=user_id, is_active=True).first()
+        if user is not None:
+            remember_frontend_user(user)
+    return user
+
+
+def remember_frontend_user(user):
+    caches[FRONTEND_USER_CACHE].set(frontend_user_cache_key(user.pk), user, FRONTEND_USER_CACHE_TIMEOUT)
+
+
+def forget_frontend_user(user_id):
+    caches[FRONTEND_USER_CACHE].delete(frontend_user_cache_key(user_id))
+
+
+def get_frontend_user(request):
+    """Користувач із сесії; сесія очищується, якщо його видалено або деактивовано"""
+    user_id = request.session.get('frontend_user_id')
+    if user_id is None:
+        return None
+    user = load_frontend_user(user_id)
+    if user is None:
+        for key in SESSION_KEYS:
+            request.session.pop(key, None)
+    return user
+
+
+class FrontendUserMiddleware:
+    """Додає лінивий ``request.frontend_user`` (None, якщо вхід не виконано)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.frontend_user = SimpleLazyObject(lambda: get_frontend_user(request))
+        return self.get_response(request)
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.7 on 2026-10-18 12:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0002_settinggroup_setting_settingvalue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='temp_imports/', verbose_name='Файл')),
+                ('original_name', models.CharField(blank=True, max_length=255, verbose_name='Назва файлу')),
+                ('sheets', models.JSONField(blank=True, default=list, verbose_name='Вкладки')),
+                ('status', models.CharField(choices=[('pending', 'В черзі'), ('running', 'Виконується'), ('done', 'Завершено'), ('failed', 'Помилка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('rows_done', models.PositiveIntegerField(default=0, verbose_name='Оброблено рядків')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='Створено')),
+                ('updated_count', models.PositiveIntegerField(default=0, verbose_name='Оновлено')),
+                ('categories_count', models.PositiveIntegerField(default=0, verbose_name='Створено категорій')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='Помилок')),
+                ('message', models.TextField(blank=True, verbose_name='Повідомлення')),
+                ('log', models.TextField(blank=True, verbose_name='Журнал')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата створення')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Початок')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершення')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('import_template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='gir.importtemplate', verbose_name='Шаблон імпорту')),
+            ],
+            options={
+                'verbose_name': 'Завдання імпорту',
+                'verbose_name_plural': 'Завдання імпорту',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='gir_importj_status_6cd76d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-18 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0003_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='unchanged_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Без змін'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='import_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Відбиток імпорту'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.7 on 2026-10-18 12:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0004_product_import_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='force',
+            field=models.BooleanField(default=False, verbose_name='Імпортувати повторно'),
+        ),
+        migrations.CreateModel(
+            name='ImportedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('sheets', models.CharField(blank=True, max_length=1000, verbose_name='Вкладки')),
+                ('file_name', models.CharField(blank=True, max_length=255, verbose_name='Назва файлу')),
+                ('rows', models.PositiveIntegerField(default=0, verbose_name='Оброблено рядків')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='Створено')),
+                ('updated_count', models.PositiveIntegerField(default=0, verbose_name='Оновлено')),
+                ('unchanged_count', models.PositiveIntegerField(default=0, verbose_name='Без змін')),
+                ('categories_count', models.PositiveIntegerField(default=0, verbose_name='Створено категорій')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='Помилок')),
+                ('imported_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата імпорту')),
+                ('import_template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='imported_files', to='gir.importtemplate', verbose_name='Шаблон імпорту')),
+            ],
+            options={
+                'verbose_name': 'Імпортований файл',
+                'verbose_name_plural': 'Імпортовані файли',
+                'ordering': ['-imported_at'],
+                'indexes': [models.Index(fields=['sha256'], name='gir_importe_sha256_ad26fe_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0005_importedfile'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importtemplate',
+            name='field_mapping',
+            field=models.JSONField(default=dict, help_text='JSON з маппінгом полів Excel → Django, наприклад {"Найменування": "title"}. Порожній маппінг - стандартні колонки кошторису', verbose_name='Маппінг полів'),
+        ),
+    ]
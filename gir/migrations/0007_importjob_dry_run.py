@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0006_importtemplate_field_mapping_help'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='dry_run',
+            field=models.BooleanField(default=False, verbose_name='Лише перевірка (без запису)'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='report',
+            field=models.FileField(blank=True, upload_to='import_reports/', verbose_name='Звіт змін'),
+        ),
+    ]
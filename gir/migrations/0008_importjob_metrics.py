@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0007_importjob_dry_run'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='metrics',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Метрики'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0008_importjob_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportLayout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64, unique=True, verbose_name='Відбиток')),
+                ('header_row', models.PositiveIntegerField(verbose_name='Рядок заголовків')),
+                ('headers', models.JSONField(default=list, verbose_name='Заголовки')),
+                ('columns', models.JSONField(default=dict, verbose_name='Індекси колонок')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Використань')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата створення')),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Останнє використання')),
+            ],
+            options={
+                'verbose_name': 'Розкладка колонок',
+                'verbose_name_plural': 'Розкладки колонок',
+                'ordering': ['-last_used_at'],
+            },
+        ),
+    ]
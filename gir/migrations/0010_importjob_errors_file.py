@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0009_importlayout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='errors_file',
+            field=models.FileField(blank=True, upload_to='import_errors/', verbose_name='Рядки з помилками'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0010_importjob_errors_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('sheet', models.CharField(max_length=255, verbose_name='Вкладка')),
+                ('last_row', models.PositiveIntegerField(verbose_name='Останній записаний рядок')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата оновлення')),
+                ('import_template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='gir.importtemplate', verbose_name='Шаблон імпорту')),
+            ],
+            options={
+                'verbose_name': 'Контрольна точка імпорту',
+                'verbose_name_plural': 'Контрольні точки імпорту',
+                'ordering': ['-updated_at'],
+                'indexes': [models.Index(fields=['sha256', 'sheet'], name='gir_importc_sha256_a0e2d1_idx')],
+            },
+        ),
+    ]
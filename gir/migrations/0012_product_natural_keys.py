@@ -0,0 +1,105 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:28
+
+import hashlib
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+BATCH_SIZE = 1000
+
+# Порожні поля товару, що залишається, заповнюються з його дублікатів
+MERGE_FIELDS = [
+    'description', 'unit', 'cost_price', 'wholesale_price', 'modules_count', 'url', 'external_link',
+]
+
+# Службові поля, що не показуються у звіті про відкинуті значення
+REPORT_EXCLUDE = {'id', 'sku', 'import_hash', 'title_hash', 'created_at', 'updated_at'}
+
+
+def title_key(title):
+    # Копія gir.models.title_key на момент міграції
+    normalized = ' '.join(str(title or '').split()).casefold()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def fill_title_hash(apps, schema_editor):
+    Product = apps.get_model('gir', 'Product')
+    batch = []
+    for product in Product.objects.only('pk', 'title').iterator(chunk_size=BATCH_SIZE):
+        product.title_hash = title_key(product.title)
+        batch.append(product)
+        if len(batch) >= BATCH_SIZE:
+            Product.objects.bulk_update(batch, ['title_hash'])
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, ['title_hash'])
+
+
+def merge_duplicate_skus(apps, schema_editor):
+    """
+    Перед унікальним індексом об'єднує товари з однаковим артикулом.
+
+    Залишається той товар, який знаходив і оновлював імпорт:
+    ``filter(sku=...).first()`` з ``Meta.ordering = ['title']``, тобто
+    перший за назвою (серед однакових назв - з найменшим id). Його порожні
+    поля заповнюються з дублікатів, дублікати видаляються; значення
+    дублікатів, що відрізнялися і були відкинуті, виводяться у звіт.
+    """
+    Product = apps.get_model('gir', 'Product')
+    duplicates = (
+        Product.objects.exclude(sku='').values('sku')
+        .annotate(count=Count('pk')).filter(count__gt=1).values_list('sku', flat=True)
+    )
+    for sku in list(duplicates):
+        keep, *others = Product.objects.filter(sku=sku).order_by('title', 'pk')
+        changed = []
+        for field in MERGE_FIELDS:
+            if getattr(keep, field) in (None, ''):
+                value = next((getattr(p, field) for p in others if getattr(p, field) not in (None, '')), None)
+                if value is not None:
+                    setattr(keep, field, value)
+                    changed.append(field)
+        if changed:
+            keep.save(update_fields=changed)
+        Product.objects.filter(pk__in=[p.pk for p in others]).delete()
+        print(
+            f'\n  Артикул {sku}: залишено товар #{keep.pk}, '
+            f'об\'єднано і видалено {", ".join(f"#{p.pk}" for p in others)}'
+        )
+        for other in others:
+            discarded = [
+                f'{field.attname}={getattr(other, field.attname)!r} '
+                f'(залишено {getattr(keep, field.attname)!r})'
+                for field in Product._meta.concrete_fields
+                if field.attname not in REPORT_EXCLUDE
+                and getattr(other, field.attname) not in (None, '')
+                and getattr(other, field.attname) != getattr(keep, field.attname)
+            ]
+            if discarded:
+                print(f'    #{other.pk}: відкинуто {"; ".join(discarded)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0011_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='title_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Відбиток назви'),
+        ),
+        migrations.RunPython(fill_title_hash, migrations.RunPython.noop),
+        migrations.RunPython(merge_duplicate_skus, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['title_hash'], name='gir_product_title_h_aea663_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.UniqueConstraint(condition=models.Q(('sku', ''), _negated=True), fields=('sku',), name='gir_product_sku_unique', violation_error_message='Товар з таким артикулом вже існує'),
+        ),
+    ]
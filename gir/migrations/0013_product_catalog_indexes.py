@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0012_product_natural_keys'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='gir_product_title_cd0385_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['title', 'id'], name='gir_product_title_94f58d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'title', 'id'], name='gir_product_categor_4e9cd1_idx'),
+        ),
+    ]
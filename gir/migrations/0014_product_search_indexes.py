@@ -0,0 +1,49 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:41
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models.functions import Upper
+
+
+# Індекси пошуку існують лише в PostgreSQL (на SQLite пошук працює в пам'яті),
+# тому вони не описані в Product.Meta і створюються тут напряму
+SEARCH_INDEXES = [
+    # Копія gir.search.SEARCH_VECTOR на момент міграції
+    GinIndex(
+        SearchVector('title', 'sku', weight='A', config='simple')
+        + SearchVector('description', weight='C', config='simple'),
+        name='gir_product_search_idx',
+    ),
+    GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='gir_product_title_trgm_idx'),
+    # sku__icontains: UPPER(sku) LIKE UPPER('%...%')
+    GinIndex(OpClass(Upper('sku'), name='gin_trgm_ops'), name='gir_product_sku_trgm_idx'),
+]
+
+
+def add_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    Product = apps.get_model('gir', 'Product')
+    for index in SEARCH_INDEXES:
+        schema_editor.add_index(Product, index)
+
+
+def remove_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Product = apps.get_model('gir', 'Product')
+    for index in SEARCH_INDEXES:
+        schema_editor.remove_index(Product, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0013_product_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_indexes, remove_search_indexes),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0015_importedfile_errors_file'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated_at'], name='gir_product_updated_1367ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'updated_at'], name='gir_product_categor_ce01ce_idx'),
+        ),
+    ]
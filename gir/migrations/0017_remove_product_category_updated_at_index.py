@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-18 14:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0016_product_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='gir_product_categor_ce01ce_idx',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.7 on 2026-10-18 14:06
+
+import gir.storage
+from django.db import migrations, models
+
+
+def move_errors_files(apps, schema_editor):
+    names = set()
+    for model in ('ImportJob', 'ImportedFile'):
+        names.update(apps.get_model('gir', model).objects.exclude(errors_file='').values_list('errors_file', flat=True))
+    gir.storage.move_to_private_storage(names)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0017_remove_product_category_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importedfile',
+            name='errors_file',
+            field=models.FileField(blank=True, storage=gir.storage.get_private_storage, upload_to='import_errors/', verbose_name='Рядки з помилками'),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='errors_file',
+            field=models.FileField(blank=True, storage=gir.storage.get_private_storage, upload_to='import_errors/', verbose_name='Рядки з помилками'),
+        ),
+        migrations.RunPython(move_errors_files, migrations.RunPython.noop),
+    ]
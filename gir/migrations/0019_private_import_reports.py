@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-18 14:08
+
+import gir.storage
+from django.db import migrations, models
+
+
+def move_reports(apps, schema_editor):
+    ImportJob = apps.get_model('gir', 'ImportJob')
+    gir.storage.move_to_private_storage(ImportJob.objects.exclude(report='').values_list('report', flat=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0018_private_errors_files'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='report',
+            field=models.FileField(blank=True, storage=gir.storage.get_private_storage, upload_to='import_reports/', verbose_name='Звіт змін'),
+        ),
+        migrations.RunPython(move_reports, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-18 14:09
+
+import gir.storage
+from django.db import migrations, models
+
+
+def move_import_files(apps, schema_editor):
+    ImportJob = apps.get_model('gir', 'ImportJob')
+    gir.storage.move_to_private_storage(ImportJob.objects.exclude(file='').values_list('file', flat=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gir', '0019_private_import_reports'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='file',
+            field=models.FileField(storage=gir.storage.get_private_storage, upload_to=gir.storage.import_upload_to, verbose_name='Файл'),
+        ),
+        migrations.RunPython(move_import_files, migrations.RunPython.noop),
+    ]
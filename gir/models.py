@@ -1,10 +1,15 @@
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from django.contrib.auth.hashers import make_password
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.utils import timezone
+import hashlib
 import secrets
 import string
 
+from .hashers import frontend_hasher
+from .storage import get_private_storage, import_upload_to
+
 class User(AbstractUser):
     # Только для входа в админ панель Django
     # Наследуем все стандартные поля Django
@@ -37,11 +42,21 @@ class FrontendUser(models.Model):
         return f"{self.username} (користувач)"
 
     def save(self, *args, **kwargs):
-        # Хешируем пароль при сохранении
-        if not self.pk or self._state.adding:  # Если это новый объект
-            self.password = make_password(self.password)
+        # Хешируем пароль при создании, если он ещё не захеширован
+        if self._state.adding and not self._password_is_hashed():
+            self.set_password(self.password)
         super().save(*args, **kwargs)
 
+    def _password_is_hashed(self):
+        try:
+            identify_hasher(self.password)
+        except ValueError:
+            return False
+        return True
+
+    def set_password(self, raw_password):
+        self.password = make_password(raw_password, hasher=frontend_hasher())
+
     def generate_password(self):
         # Генерируем случайный пароль
         alphabet = string.ascii_letters + string.digits + "!@#$%^&*"
@@ -50,9 +65,11 @@ class FrontendUser(models.Model):
         return password
 
     def check_password(self, raw_password):
-        # Проверяем пароль
-        from django.contrib.auth.hashers import check_password
-        return check_password(raw_password, self.password)
+        # Проверяем пароль; хеш устаревшего алгоритма или стоимости обновляется
+        def setter(raw_password):
+            self.set_password(raw_password)
+            self.save(update_fields=['password'])
+        return check_password(raw_password, self.password, setter, preferred=frontend_hasher())
 
     class Meta:
         verbose_name = "Користувач"
@@ -74,6 +91,11 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+def title_key(title):
+    """Відбиток нормалізованої назви товару: без урахування регістру і зайвих пробілів"""
+    normalized = ' '.join(str(title or '').split()).casefold()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
 class Product(models.Model):
     category = models.ForeignKey(
         Category,
@@ -104,6 +126,10 @@ class Product(models.Model):
     url = models.SlugField(max_length=500, verbose_name="URL товара", blank=True)
     external_link = models.CharField(max_length=500, verbose_name="Посилання", blank=True)
     is_active = models.BooleanField(default=True, verbose_name="Активний")
+    # Відбиток полів з останнього імпорту: рядки з тим самим відбитком не перезаписуються
+    import_hash = models.CharField(max_length=64, blank=True, editable=False, verbose_name="Відбиток імпорту")
+    # Ключ для зіставлення за назвою (title_key): рівність по індексу замість порівняння довгих рядків
+    title_hash = models.CharField(max_length=64, blank=True, editable=False, verbose_name="Відбиток назви")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата створення")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата оновлення")
 
@@ -112,14 +138,41 @@ class Product(models.Model):
         verbose_name_plural = "Товари"
         ordering = ['title']
         indexes = [
-            models.Index(fields=['title']),
+            # Сортування і пагінація курсором каталогу (title, id), в т.ч. в межах категорії
+            models.Index(fields=['title', 'id']),
             models.Index(fields=['sku']),
+            models.Index(fields=['title_hash']),
             models.Index(fields=['category']),
+            models.Index(fields=['category', 'title', 'id']),
+            # max(updated_at) для ETag/Last-Modified API каталогу без перебору товарів
+            models.Index(fields=['updated_at']),
+        ]
+        constraints = [
+            # Артикул - природний ключ товару; порожній артикул може бути в багатьох товарів
+            models.UniqueConstraint(
+                fields=['sku'],
+                condition=~models.Q(sku=''),
+                name='gir_product_sku_unique',
+                violation_error_message='Товар з таким артикулом вже існує',
+            ),
         ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.title_hash = title_key(self.title)
+        # Ручна зміна (адмінка тощо): наступний імпорт має застосувати значення
+        # з книги, а не вважати рядок незмінним. Імпорт пише через bulk_* без save()
+        self.import_hash = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            extra = {'import_hash'}
+            if 'title' in update_fields:
+                extra.add('title_hash')
+            kwargs['update_fields'] = {*update_fields, *extra}
+        super().save(*args, **kwargs)
+
 class ImportTemplate(models.Model):
     name = models.CharField(max_length=255, verbose_name="Назва імпорту")
     description = models.TextField(blank=True, verbose_name="Опис")
@@ -133,7 +186,8 @@ class ImportTemplate(models.Model):
     field_mapping = models.JSONField(
         verbose_name="Маппінг полів",
         default=dict,
-        help_text="JSON з маппінгом полів Excel → Django"
+        help_text='JSON з маппінгом полів Excel → Django, наприклад {"Найменування": "title"}. '
+                  'Порожній маппінг - стандартні колонки кошторису'
     )
     
     # Налаштування обробки
@@ -151,6 +205,212 @@ class ImportTemplate(models.Model):
     def __str__(self):
         return self.name
 
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        from gir.importing.parsing import validate_field_mapping
+        errors = validate_field_mapping(self.field_mapping)
+        if errors:
+            raise ValidationError({'field_mapping': errors})
+
+class ImportJob(models.Model):
+    # Черга фонових імпортів: адмінка ставить завдання, run_import_worker виконує
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'В черзі'),
+        (STATUS_RUNNING, 'Виконується'),
+        (STATUS_DONE, 'Завершено'),
+        (STATUS_FAILED, 'Помилка'),
+    ]
+
+    import_template = models.ForeignKey(
+        ImportTemplate,
+        on_delete=models.SET_NULL,
+        verbose_name="Шаблон імпорту",
+        related_name='jobs',
+        null=True,
+        blank=True
+    )
+    file = models.FileField(upload_to=import_upload_to, storage=get_private_storage, verbose_name="Файл")
+    original_name = models.CharField(max_length=255, verbose_name="Назва файлу", blank=True)
+    sheets = models.JSONField(default=list, blank=True, verbose_name="Вкладки")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="Статус"
+    )
+
+    # Прогрес
+    rows_done = models.PositiveIntegerField(default=0, verbose_name="Оброблено рядків")
+    created_count = models.PositiveIntegerField(default=0, verbose_name="Створено")
+    updated_count = models.PositiveIntegerField(default=0, verbose_name="Оновлено")
+    unchanged_count = models.PositiveIntegerField(default=0, verbose_name="Без змін")
+    categories_count = models.PositiveIntegerField(default=0, verbose_name="Створено категорій")
+    error_count = models.PositiveIntegerField(default=0, verbose_name="Помилок")
+    message = models.TextField(blank=True, verbose_name="Повідомлення")
+    log = models.TextField(blank=True, verbose_name="Журнал")
+    metrics = models.JSONField(default=dict, blank=True, verbose_name="Метрики")
+
+    force = models.BooleanField(default=False, verbose_name="Імпортувати повторно")
+    dry_run = models.BooleanField(default=False, verbose_name="Лише перевірка (без запису)")
+    report = models.FileField(
+        upload_to='import_reports/', storage=get_private_storage, blank=True, verbose_name="Звіт змін"
+    )
+    errors_file = models.FileField(
+        upload_to='import_errors/', storage=get_private_storage, blank=True, verbose_name="Рядки з помилками"
+    )
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        verbose_name="Автор",
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата створення")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Початок")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Завершення")
+    # Обробник періодично оновлює мітку, поки виконує завдання; завдання без
+    # оновлень довше за --stale-after вважається перерваним (run_import_worker)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Остання активність")
+
+    class Meta:
+        verbose_name = "Завдання імпорту"
+        verbose_name_plural = "Завдання імпорту"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.original_name or self.file.name} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    @property
+    def elapsed(self):
+        """Тривалість виконання в секундах"""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or timezone.now()
+        return max((end - self.started_at).total_seconds(), 0.0)
+
+    @property
+    def throughput(self):
+        """Швидкість обробки, рядків за секунду"""
+        elapsed = self.elapsed
+        return self.rows_done / elapsed if elapsed else 0.0
+
+    def update_progress(self, stats):
+        # Оновлюємо лише лічильники одним UPDATE, не чіпаючи решту полів
+        values = {
+            'rows_done': stats.rows,
+            'created_count': stats.created,
+            'updated_count': stats.updated,
+            'unchanged_count': stats.unchanged,
+            'categories_count': stats.categories,
+            'error_count': stats.errors,
+            'heartbeat_at': timezone.now(),
+        }
+        ImportJob.objects.filter(pk=self.pk).update(**values)
+        for field, value in values.items():
+            setattr(self, field, value)
+
+class ImportedFile(models.Model):
+    # Результати імпорту за SHA-256 вмісту файлу: повторне завантаження того ж
+    # файлу з тими ж параметрами не розбирається і не пишеться в базу вдруге
+    sha256 = models.CharField(max_length=64, verbose_name="SHA-256")
+    import_template = models.ForeignKey(
+        ImportTemplate,
+        on_delete=models.CASCADE,
+        verbose_name="Шаблон імпорту",
+        related_name='imported_files',
+        null=True,
+        blank=True
+    )
+    sheets = models.CharField(max_length=1000, blank=True, verbose_name="Вкладки")
+    file_name = models.CharField(max_length=255, blank=True, verbose_name="Назва файлу")
+
+    rows = models.PositiveIntegerField(default=0, verbose_name="Оброблено рядків")
+    created_count = models.PositiveIntegerField(default=0, verbose_name="Створено")
+    updated_count = models.PositiveIntegerField(default=0, verbose_name="Оновлено")
+    unchanged_count = models.PositiveIntegerField(default=0, verbose_name="Без змін")
+    categories_count = models.PositiveIntegerField(default=0, verbose_name="Створено категорій")
+    error_count = models.PositiveIntegerField(default=0, verbose_name="Помилок")
+    # Файл рядків з помилками першого імпорту: показується і для повторного завантаження
+    errors_file = models.FileField(
+        upload_to='import_errors/', storage=get_private_storage, blank=True, verbose_name="Рядки з помилками"
+    )
+
+    imported_at = models.DateTimeField(default=timezone.now, verbose_name="Дата імпорту")
+
+    class Meta:
+        verbose_name = "Імпортований файл"
+        verbose_name_plural = "Імпортовані файли"
+        ordering = ['-imported_at']
+        indexes = [
+            models.Index(fields=['sha256']),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name or self.sha256[:12]} ({self.imported_at:%d.%m.%Y %H:%M})"
+
+    @staticmethod
+    def sheets_key(sheets):
+        """Нормалізований запис вибору вкладок ('' - всі вкладки)"""
+        return ', '.join(sorted(sheets or []))
+
+class ImportCheckpoint(models.Model):
+    # Останній закомічений рядок вкладки: якщо імпорт перервався, наступний
+    # імпорт того ж файлу продовжує вкладку з наступного рядка
+    sha256 = models.CharField(max_length=64, verbose_name="SHA-256")
+    import_template = models.ForeignKey(
+        ImportTemplate,
+        on_delete=models.CASCADE,
+        verbose_name="Шаблон імпорту",
+        related_name='checkpoints',
+        null=True,
+        blank=True
+    )
+    sheet = models.CharField(max_length=255, verbose_name="Вкладка")
+    last_row = models.PositiveIntegerField(verbose_name="Останній записаний рядок")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата оновлення")
+
+    class Meta:
+        verbose_name = "Контрольна точка імпорту"
+        verbose_name_plural = "Контрольні точки імпорту"
+        ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['sha256', 'sheet']),
+        ]
+
+    def __str__(self):
+        return f"{self.sheet}: рядок {self.last_row}"
+
+class ImportLayout(models.Model):
+    # Кеш розкладок колонок: відбиток рядка заголовків (разом з маппінгом шаблону)
+    # → індекси колонок; відомі розкладки не потребують пошуку заголовків
+    fingerprint = models.CharField(max_length=64, unique=True, verbose_name="Відбиток")
+    header_row = models.PositiveIntegerField(verbose_name="Рядок заголовків")
+    headers = models.JSONField(default=list, verbose_name="Заголовки")
+    columns = models.JSONField(default=dict, verbose_name="Індекси колонок")
+    hits = models.PositiveIntegerField(default=0, verbose_name="Використань")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата створення")
+    last_used_at = models.DateTimeField(default=timezone.now, verbose_name="Останнє використання")
+
+    class Meta:
+        verbose_name = "Розкладка колонок"
+        verbose_name_plural = "Розкладки колонок"
+        ordering = ['-last_used_at']
+
+    def __str__(self):
+        return f"{self.fingerprint[:12]} (рядок {self.header_row})"
+
 class SettingGroup(models.Model):
     name = models.CharField(max_length=255, verbose_name="Назва групи")
     description = models.TextField(blank=True, verbose_name="Опис")
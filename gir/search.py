@@ -0,0 +1,252 @@
+"""
+Пошук товарів за назвою, артикулом, описом і назвою категорії
+з урахуванням опечаток і ранжуванням.
+
+На PostgreSQL працює ``PostgresSearchBackend``: повнотекстовий пошук
+(SearchVector) і pg_trgm по GIN індексах з міграції 0014. На інших базах
+(SQLite) - ``InMemorySearchBackend``: індекс слів у пам'яті процесу.
+Бекенд можна задати шляхом до класу в ``PRODUCT_SEARCH_BACKEND``.
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import Case, Count, F, FloatField, Max, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils.module_loading import import_string
+
+from .models import Category, Product
+
+
+# Максимум результатів пошуку (для списку на фронтенді і фільтра в адмінці на SQLite)
+SEARCH_LIMIT = 1000
+
+# Словник без стемінгу: українського словника у PostgreSQL немає, а назви
+# товарів здебільшого складаються з марок, моделей і артикулів
+SEARCH_CONFIG = 'simple'
+
+# Той самий вираз, що й у GIN індексі міграції 0014 - інакше індекс не використовується
+SEARCH_VECTOR = (
+    SearchVector('title', 'sku', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+)
+
+# Мінімальна схожість слова для пошуку в пам'яті (у PostgreSQL діє pg_trgm.word_similarity_threshold)
+TRIGRAM_THRESHOLD = 0.4
+
+
+class PostgresSearchBackend:
+    """Пошук засобами PostgreSQL: кожна умова OR має свій індекс"""
+
+    def _condition(self, term):
+        categories = Category.objects.filter(
+            Q(name__icontains=term) | Q(name__trigram_word_similar=term)
+        ).values('pk')
+        return (
+            Q(search=SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch'))
+            | Q(title__trigram_word_similar=term)
+            | Q(sku__icontains=term)
+            | Q(category__in=categories)
+        )
+
+    def filter(self, queryset, term):
+        return queryset.annotate(search=SEARCH_VECTOR).filter(self._condition(term))
+
+    def search(self, queryset, term, limit=SEARCH_LIMIT):
+        query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+        return list(
+            self.filter(queryset, term)
+            .annotate(rank=Greatest(
+                SearchRank(F('search'), query),
+                TrigramWordSimilarity(term, 'title'),
+                Case(When(sku__iexact=term, then=Value(1.0)), default=Value(0.0), output_field=FloatField()),
+            ))
+            .order_by('-rank', 'title', 'pk')[:limit]
+        )
+
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return WORD_RE.findall(str(text or '').casefold())
+
+
+def trigrams(word):
+    """Триграми слова з відступами, як у pg_trgm"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ProductIndex:
+    """
+    Індекс слів товарів: слово -> {id товару: вага поля}.
+
+    Опечатки знаходяться серед слів словника (їх значно менше, ніж товарів)
+    за спільними триграмами, префікси - бінарним пошуком у відсортованому
+    словнику.
+    """
+    FIELD_WEIGHTS = {'title': 1.0, 'sku': 1.0, 'category': 0.6, 'description': 0.3}
+    PREFIX_SCORE = 0.9
+
+    def __init__(self, rows):
+        self.postings = defaultdict(dict)
+        self.titles = {}
+        for pk, title, sku, description, category in rows:
+            self.titles[pk] = title
+            for field, text in (('description', description), ('category', category), ('title', title)):
+                for word in tokenize(text):
+                    self._add(word, pk, self.FIELD_WEIGHTS[field])
+            if sku:
+                # Артикул шукається і цілим, і частинами
+                self._add(sku.casefold(), pk, self.FIELD_WEIGHTS['sku'])
+                for word in tokenize(sku):
+                    self._add(word, pk, self.FIELD_WEIGHTS['sku'])
+
+        self.vocabulary = sorted(self.postings)
+        self.by_trigram = defaultdict(list)
+        self.trigram_counts = {}
+        for word in self.vocabulary:
+            word_trigrams = trigrams(word)
+            self.trigram_counts[word] = len(word_trigrams)
+            for trigram in word_trigrams:
+                self.by_trigram[trigram].append(word)
+
+    def _add(self, word, pk, weight):
+        postings = self.postings[word]
+        if postings.get(pk, 0) < weight:
+            postings[pk] = weight
+
+    def similar_words(self, word):
+        """{слово словника: схожість} для точного збігу, префікса і опечатки"""
+        found = {}
+        if word in self.postings:
+            found[word] = 1.0
+        start = bisect.bisect_left(self.vocabulary, word)
+        for candidate in self.vocabulary[start:start + SEARCH_LIMIT]:
+            if not candidate.startswith(word):
+                break
+            found.setdefault(candidate, self.PREFIX_SCORE)
+        if len(word) >= 3:
+            found.update({
+                candidate: similarity for candidate, similarity in self._fuzzy_words(word).items()
+                if candidate not in found
+            })
+        return found
+
+    def _fuzzy_words(self, word):
+        """
+        Слова словника, схожі на ``word`` за коефіцієнтом Жаккара триграм.
+
+        Кандидати збираються лише за рідкісними триграмами: спільні для
+        більшості словника (префікси артикулів тощо) дали б перебір усього
+        словника; їх наявність у кандидата перевіряється підрядком.
+        """
+        word_trigrams = trigrams(word)
+        lists = sorted(
+            ((trigram, self.by_trigram.get(trigram, ())) for trigram in word_trigrams),
+            key=lambda item: len(item[1]),
+        )
+        common_limit = max(len(self.vocabulary) // 20, 1000)
+        rare = [item for item in lists if len(item[1]) <= common_limit] or lists[:1]
+        common = [trigram for trigram, _ in lists[len(rare):]]
+
+        shared = Counter()
+        for _, words in rare:
+            shared.update(words)
+        found = {}
+        for candidate, count in shared.items():
+            if common:
+                padded = f'  {candidate} '
+                count += sum(1 for trigram in common if trigram in padded)
+            similarity = count / (len(word_trigrams) + self.trigram_counts[candidate] - count)
+            if similarity >= TRIGRAM_THRESHOLD:
+                found[candidate] = similarity
+        return found
+
+    def search(self, term, limit=SEARCH_LIMIT):
+        """Id товарів, де знайдено кожне слово запиту, від найрелевантніших"""
+        scores = None
+        for word in set(tokenize(term)):
+            word_scores = {}
+            for candidate, similarity in self.similar_words(word).items():
+                for pk, weight in self.postings[candidate].items():
+                    score = similarity * weight
+                    if word_scores.get(pk, 0) < score:
+                        word_scores[pk] = score
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {pk: score + word_scores[pk] for pk, score in scores.items() if pk in word_scores}
+            if not scores:
+                return []
+        ranked = heapq.nsmallest(
+            limit, (scores or {}).items(), key=lambda item: (-item[1], self.titles[item[0]], item[0])
+        )
+        return [pk for pk, _ in ranked]
+
+
+class InMemorySearchBackend:
+    """
+    Запасний пошук для баз без pg_trgm (SQLite). Індекс будується в пам'яті
+    процесу і перебудовується, коли змінюються товари або категорії
+    (перевірка - два агрегатні запити, не частіше ніж раз на
+    ``VERSION_CHECK_SECONDS``). Фільтр повертає не більше ``SEARCH_LIMIT``
+    найрелевантніших товарів.
+    """
+    VERSION_CHECK_SECONDS = 5
+
+    _lock = threading.Lock()
+    _index = None
+    _version = None
+    _checked_at = None
+
+    def _current_version(self):
+        products = Product.objects.aggregate(count=Count('pk'), changed=Max('updated_at'))
+        categories = Category.objects.aggregate(changed=Max('updated_at'))
+        return products['count'], products['changed'], categories['changed']
+
+    def index(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.VERSION_CHECK_SECONDS:
+                return self._index
+            version = self._current_version()
+            if self._index is None or self._version != version:
+                rows = Product.objects.values_list('pk', 'title', 'sku', 'description', 'category__name')
+                InMemorySearchBackend._index = ProductIndex(rows.iterator(chunk_size=2000))
+                InMemorySearchBackend._version = version
+            InMemorySearchBackend._checked_at = now
+            return self._index
+
+    def filter(self, queryset, term):
+        return queryset.filter(pk__in=self.index().search(term))
+
+    def search(self, queryset, term, limit=SEARCH_LIMIT):
+        ranked = self.index().search(term)
+        found = []
+        # Фільтри queryset можуть відкинути частину знайдених - добираємо частинами
+        for start in range(0, len(ranked), limit):
+            chunk = ranked[start:start + limit]
+            products = queryset.in_bulk(chunk)
+            found.extend(products[pk] for pk in chunk if pk in products)
+            if len(found) >= limit:
+                break
+        return found[:limit]
+
+
+def get_search_backend():
+    path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return InMemorySearchBackend()
@@ -0,0 +1,32 @@
+from rest_framework import serializers
+
+from .models import Category, Product
+
+
+class CategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'slug']
+
+
+class ProductSerializer(serializers.ModelSerializer):
+    """Товар у списку каталогу: без опису і облікової ціни"""
+    category = CategorySerializer(read_only=True)
+
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'title', 'sku', 'unit', 'category', 'wholesale_price', 'stock_quantity',
+            'modules_count', 'url', 'external_link', 'is_active', 'updated_at',
+        ]
+
+    @classmethod
+    def only_fields(cls):
+        """Колонки для ``.only()``: лише те, що віддає серіалізатор"""
+        fields = [name for name in cls.Meta.fields if name != 'category']
+        return fields + [f'category__{name}' for name in CategorySerializer.Meta.fields]
+
+
+class ProductDetailSerializer(ProductSerializer):
+    class Meta(ProductSerializer.Meta):
+        fields = ProductSerializer.Meta.fields + ['description']
@@ -0,0 +1,85 @@
+"""
+Сесії з кешем і відкладеним записом у базу (``SESSION_ENGINE = 'gir.sessions'``).
+
+Як і ``cached_db``, сесія читається з кешу і лише при промаху - з
+django_session. Запис у кеш відбувається при кожному збереженні, а в базу -
+лише коли змінилися дані сесії або термін дії копії в базі відстає більш
+ніж на ``SESSION_DB_SYNC_SECONDS``. З ``SESSION_SAVE_EVERY_REQUEST`` сесія
+продовжується на кожному запиті, але в базу це продовження пишеться не
+частіше за раз на ``SESSION_DB_SYNC_SECONDS``. Втрата кешу безпечна: дані
+в базі завжди актуальні, відстає лише термін дії.
+
+Кеш (``SESSION_CACHE_ALIAS``) має бути спільним для процесів gunicorn,
+наприклад файловим - інакше процес може прочитати застарілу копію.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.utils import timezone
+
+
+DB_SYNC_SECONDS = getattr(settings, 'SESSION_DB_SYNC_SECONDS', 24 * 60 * 60)
+
+# Прострочені сесії видаляються пачками, щоб не тримати довгу транзакцію
+CLEANUP_BATCH_SIZE = 10000
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = 'gir.sessions'
+
+    @property
+    def db_state_key(self):
+        """Ключ кешу з відбитком даних і терміном дії копії в базі"""
+        return f'{self.cache_key}:db'
+
+    def _digest(self, data):
+        return hashlib.sha256(self.serializer().dumps(data)).hexdigest()
+
+    def save(self, must_create=False):
+        if self.session_key is None or must_create:
+            super().save(must_create)
+            self._remember_db_state()
+            return
+
+        data = self._get_session()
+        expiry = self.get_expiry_date()
+        state = self._cache.get(self.db_state_key)
+        if (
+            state is not None
+            and state[0] == self._digest(data)
+            and state[1] >= expiry - timedelta(seconds=DB_SYNC_SECONDS)
+        ):
+            # Дані в базі ті самі, її термін дії ще не відстав - лише кеш
+            self._cache.set(self.cache_key, data, self.get_expiry_age())
+            return
+
+        try:
+            super().save()
+        except UpdateError:
+            # Рядок у базі вже видалено очищенням прострочених - створюємо наново
+            super().save(must_create=True)
+        self._remember_db_state()
+
+    def _remember_db_state(self):
+        expiry = self.get_expiry_date()
+        self._cache.set(self.db_state_key, (self._digest(self._get_session()), expiry), self.get_expiry_age())
+
+    def delete(self, session_key=None):
+        if session_key is None and self.session_key is not None:
+            session_key = self.session_key
+        if session_key is not None:
+            self._cache.delete(f'{self.cache_key_prefix}{session_key}:db')
+        super().delete(session_key)
+
+    @classmethod
+    def clear_expired(cls):
+        model = cls.get_model_class()
+        expired = model.objects.filter(expire_date__lt=timezone.now())
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:CLEANUP_BATCH_SIZE])
+            if not keys:
+                break
+            model.objects.filter(session_key__in=keys).delete()
@@ -0,0 +1,120 @@
+"""
+Реєстр налаштувань SettingGroup -> Setting -> SettingValue.
+
+Усі активні налаштування (в активних групах) завантажуються двома запитами
+в незмінний знімок процесу ``{Setting.key: значення}``: для типу 'single' -
+рядок, для 'list' - кортеж активних значень у порядку ``order``. Читання -
+пошук у словнику.
+
+Зміна будь-якої з трьох моделей (після коміту) записує нову мітку версії
+у спільний для процесів кеш ``SETTINGS_REGISTRY_CACHE``; кожен процес
+звіряє мітку не частіше ніж раз на ``SETTINGS_REGISTRY_CHECK_SECONDS``
+і перебудовує знімок, якщо вона змінилася.
+"""
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Setting, SettingValue
+
+
+CACHE_ALIAS = getattr(settings, 'SETTINGS_REGISTRY_CACHE', 'default')
+CHECK_SECONDS = getattr(settings, 'SETTINGS_REGISTRY_CHECK_SECONDS', 2)
+VERSION_KEY = 'gir:settings_registry:version'
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    version: str
+    values: MappingProxyType
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def __contains__(self, key):
+        return key in self.values
+
+
+_lock = threading.Lock()
+_snapshot = None
+_checked_at = None
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def current_version():
+    """Мітка версії з кешу; створюється, якщо її ще немає (або кеш очищено)"""
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def load_snapshot(version):
+    """Знімок з бази: налаштування одним запитом, значення списків - другим"""
+    rows = (
+        Setting.objects.filter(is_active=True, group__is_active=True)
+        .values_list('pk', 'key', 'setting_type', 'value')
+    )
+    values = {}
+    lists = {}
+    for pk, key, setting_type, value in rows:
+        if setting_type == 'list':
+            lists[pk] = key
+            values[key] = []
+        else:
+            values[key] = value
+
+    if lists:
+        items = (
+            SettingValue.objects.filter(setting__in=list(lists), is_active=True)
+            .order_by('setting', 'order', 'value')
+            .values_list('setting', 'value')
+        )
+        for setting_id, value in items:
+            values[lists[setting_id]].append(value)
+        for key in lists.values():
+            values[key] = tuple(values[key])
+
+    return SettingsSnapshot(version=version, values=MappingProxyType(values))
+
+
+def get_snapshot():
+    """Актуальний знімок налаштувань процесу"""
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    snapshot = _snapshot
+    if snapshot is not None and now - _checked_at < CHECK_SECONDS:
+        return snapshot
+    with _lock:
+        if _snapshot is not None and now - _checked_at < CHECK_SECONDS:
+            return _snapshot
+        # Мітка читається до даних: зміна під час завантаження дасть нову мітку
+        version = current_version()
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = load_snapshot(version)
+        _checked_at = now
+        return _snapshot
+
+
+def get_setting(key, default=None):
+    return get_snapshot().get(key, default)
+
+
+def invalidate():
+    """Нова мітка версії для всіх процесів і скидання знімка поточного"""
+    global _snapshot
+    _cache().set(VERSION_KEY, uuid.uuid4().hex, None)
+    _snapshot = None
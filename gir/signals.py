@@ -0,0 +1,55 @@
+import threading
+import weakref
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import api, settings_registry
+from .middleware import forget_frontend_user
+from .models import Category, FrontendUser, Product, Setting, SettingGroup, SettingValue
+
+
+_last_delete = threading.local()
+
+
+@receiver(post_save, sender=FrontendUser)
+@receiver(post_delete, sender=FrontendUser)
+def frontend_user_changed(sender, instance, **kwargs):
+    """
+    Змінений, деактивований чи видалений користувач не має лишатися в кеші.
+    Кеш скидається після коміту: до нього інший процес прочитав би старий
+    рядок і знову заніс його в кеш. id береться одразу - після видалення
+    ``instance.pk`` стає None.
+    """
+    transaction.on_commit(partial(forget_frontend_user, instance.pk))
+
+
+@receiver(post_save, sender=SettingGroup)
+@receiver(post_delete, sender=SettingGroup)
+@receiver(post_save, sender=Setting)
+@receiver(post_delete, sender=Setting)
+@receiver(post_save, sender=SettingValue)
+@receiver(post_delete, sender=SettingValue)
+def settings_changed(sender, **kwargs):
+    """
+    Скидає реєстр налаштувань після коміту: інакше інший процес міг би
+    побудувати знімок з ще не закомічених даних під новою міткою.
+    """
+    transaction.on_commit(settings_registry.invalidate)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def catalog_deleted(sender, origin=None, **kwargs):
+    """
+    Оновлює мітку видалення каталогу після коміту. Сигнал надходить для
+    кожного видаленого об'єкта; одна операція (``origin`` - queryset або
+    об'єкт, з якого почалося видалення) ставить мітку один раз.
+    """
+    last = getattr(_last_delete, 'origin', None)
+    if origin is not None and last is not None and last() is origin:
+        return
+    _last_delete.origin = weakref.ref(origin) if origin is not None else None
+    transaction.on_commit(api.touch_catalog)
@@ -0,0 +1,56 @@
+// Фільтр списку змін з автодоповненням (gir.admin.AutocompleteListFilter)
+'use strict';
+{
+    const $ = django.jQuery;
+
+    $(function() {
+        $('.gir-autocomplete-filter').each(function() {
+            const $select = $(this);
+            $select.select2({
+                width: '100%',
+                allowClear: true,
+                placeholder: $select.data('placeholder'),
+                ajax: {
+                    url: $select.data('url'),
+                    dataType: 'json',
+                    delay: 250,
+                    data: function(params) {
+                        return {
+                            term: params.term,
+                            page: params.page,
+                            app_label: $select.data('appLabel'),
+                            model_name: $select.data('modelName'),
+                            field_name: $select.data('fieldName'),
+                        };
+                    },
+                },
+            });
+
+            $select.on('change', function() {
+                const name = $select.data('name');
+                const value = $select.val();
+                // Порожнє значення не передається, інакше фільтр отримає category__id__exact=
+                if (value) {
+                    $select.attr('name', name);
+                } else {
+                    $select.removeAttr('name');
+                }
+
+                const $form = $select.closest('form');
+                if ($form.length) {
+                    $form.trigger('submit');
+                    return;
+                }
+                // Стандартна тема адмінки: фільтри - посилання, а не форма
+                const params = new URLSearchParams(window.location.search);
+                if (value) {
+                    params.set(name, value);
+                } else {
+                    params.delete(name);
+                }
+                params.delete('p');
+                window.location.search = params.toString();
+            });
+        });
+    });
+}
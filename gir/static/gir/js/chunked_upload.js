@@ -0,0 +1,108 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Завантаження Excel файлу частинами з продовженням після обриву з'єднання
+    const form = document.getElementById('import-form');
+    if (!form || !window.fetch || !window.FormData || !window.Blob) {
+        return;
+    }
+
+    const CHUNK_SIZE = 2 * 1024 * 1024;
+    const MAX_RETRIES = 5;
+    const fileInput = form.querySelector('input[name="excel_file"]');
+    const uploadIdInput = form.querySelector('input[name="upload_id"]');
+    const uploadNameInput = form.querySelector('input[name="upload_name"]');
+    const progress = document.getElementById('upload-progress');
+    const csrfToken = form.querySelector('input[name="csrfmiddlewaretoken"]').value;
+    const uploadUrl = form.dataset.uploadUrl;
+    let uploading = false;
+
+    function newUploadId() {
+        const bytes = new Uint8Array(16);
+        window.crypto.getRandomValues(bytes);
+        return Array.from(bytes, function(b) { return b.toString(16).padStart(2, '0'); }).join('');
+    }
+
+    function sleep(ms) {
+        return new Promise(function(resolve) { setTimeout(resolve, ms); });
+    }
+
+    async function received(uploadId) {
+        const response = await fetch(uploadUrl + '?upload_id=' + uploadId, {credentials: 'same-origin'});
+        if (!response.ok) {
+            throw new Error('Не вдалося перевірити стан завантаження');
+        }
+        return (await response.json()).received;
+    }
+
+    async function sendChunk(uploadId, file, offset) {
+        const data = new FormData();
+        data.append('upload_id', uploadId);
+        data.append('offset', offset);
+        data.append('chunk', file.slice(offset, offset + CHUNK_SIZE), file.name);
+        const response = await fetch(uploadUrl, {
+            method: 'POST',
+            body: data,
+            credentials: 'same-origin',
+            headers: {'X-CSRFToken': csrfToken},
+        });
+        const result = await response.json();
+        if (response.status === 409) {
+            // Сервер вже має іншу кількість байтів - продовжуємо з неї
+            return result.received;
+        }
+        if (!response.ok) {
+            throw new Error(result.error || 'Помилка завантаження');
+        }
+        return result.received;
+    }
+
+    async function upload(file) {
+        // Той самий файл після перезавантаження сторінки продовжується з місця обриву
+        const key = 'gir-upload:' + file.name + ':' + file.size + ':' + file.lastModified;
+        let uploadId = window.localStorage.getItem(key);
+        let offset = 0;
+        if (uploadId) {
+            offset = await received(uploadId);
+        } else {
+            uploadId = newUploadId();
+            window.localStorage.setItem(key, uploadId);
+        }
+
+        let retries = 0;
+        while (offset < file.size) {
+            progress.textContent = 'Завантажено ' + Math.floor(offset * 100 / file.size) + '%';
+            try {
+                offset = await sendChunk(uploadId, file, offset);
+                retries = 0;
+            } catch (error) {
+                if (++retries > MAX_RETRIES) {
+                    throw error;
+                }
+                progress.textContent = 'З\'єднання перервано, повторна спроба...';
+                await sleep(1000 * retries);
+                offset = await received(uploadId).catch(function() { return offset; });
+            }
+        }
+        window.localStorage.removeItem(key);
+        return uploadId;
+    }
+
+    form.addEventListener('submit', function(event) {
+        const file = fileInput && fileInput.files[0];
+        if (!file || uploading) {
+            return;
+        }
+        event.preventDefault();
+        uploading = true;
+        upload(file).then(function(uploadId) {
+            uploadIdInput.value = uploadId;
+            uploadNameInput.value = file.name;
+            // Файл вже на сервері - форма надсилає лише параметри імпорту
+            fileInput.disabled = true;
+            progress.textContent = 'Файл завантажено, ставимо в чергу імпорту...';
+            form.submit();
+        }).catch(function(error) {
+            uploading = false;
+            progress.textContent = error.message + '. Надішліть форму ще раз, щоб продовжити.';
+        });
+    });
+});
@@ -0,0 +1,67 @@
+"""
+Приватні файли імпорту: вихідні книги, звіти змін і файли помилок.
+
+Вони містять рядки постачальника з обліковими цінами, тому зберігаються
+не в MEDIA_ROOT (у продакшені його віддає whitenoise), а в
+``PRIVATE_MEDIA_ROOT``. Посилання ``FieldFile.url`` веде на view адмінки
+``admin:private_file``, який перевіряє вхід і право ``gir.add_product``.
+"""
+import os
+import shutil
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils.functional import LazyObject, empty
+
+
+class PrivateStorage(FileSystemStorage):
+    def __init__(self):
+        super().__init__(location=settings.PRIVATE_MEDIA_ROOT)
+
+    def url(self, name):
+        return reverse('admin:private_file', args=[name])
+
+
+class _PrivateStorage(LazyObject):
+    def _setup(self):
+        self._wrapped = PrivateStorage()
+
+
+private_storage = _PrivateStorage()
+
+
+@receiver(setting_changed)
+def reset_private_storage(setting, **kwargs):
+    # override_settings(PRIVATE_MEDIA_ROOT=...) у тестах
+    if setting == 'PRIVATE_MEDIA_ROOT':
+        private_storage._wrapped = empty
+
+
+def get_private_storage():
+    """Для ``FileField(storage=...)``: міграції посилаються на функцію, а не на шлях"""
+    return private_storage
+
+
+def random_name(directory, filename):
+    """Випадкове ім'я з розширенням ``filename``: назва файлу постачальника не потрапляє на диск і в URL"""
+    extension = os.path.splitext(filename)[1].lower()
+    return f'{directory}/{uuid.uuid4().hex}{extension}'
+
+
+def import_upload_to(instance, filename):
+    return random_name('temp_imports', filename)
+
+
+def move_to_private_storage(names):
+    """Переносить файли з MEDIA_ROOT у приватне сховище під тими ж іменами (для міграцій)"""
+    for name in names:
+        source = os.path.join(settings.MEDIA_ROOT, name)
+        if not name or not os.path.isfile(source):
+            continue
+        target = private_storage.path(name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(source, target)
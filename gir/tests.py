@@ -1,3 +1,614 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Permission
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .hashers import TunableScryptPasswordHasher
+from .importing.engine import ProductImporter
+from .importing.parsing import (
+    MAX_LENGTHS, InvalidNumber, RowTransformer, parse_decimal, parse_int, parse_rows, to_decimal,
+)
+from .login import ATTEMPTS_CACHE, MAX_ATTEMPTS, LoginThrottled, _attempt_keys, authenticate_frontend_user
+from .management.commands.run_import_worker import STALE_AFTER_SECONDS, requeue_stale_jobs
+from .middleware import FRONTEND_USER_CACHE, frontend_user_cache_key, load_frontend_user
+from .models import Category, FrontendUser, ImportJob, ImportTemplate, Product, Setting, SettingGroup, SettingValue, User
+from .sessions import DB_SYNC_SECONDS, SessionStore
+from .storage import private_storage
+
+
+class ChangelistQueryBudgetTests(TestCase):
+    """
+    Кількість запитів списків змін адмінки не залежить від кількості рядків
+    на сторінці: зв'язані об'єкти вибираються join'ом, фільтри не вантажать
+    усі категорії чи налаштування.
+    """
+    # Сесія, користувач, підрахунок, сторінка, фільтри, savepoint'и ATOMIC_REQUESTS
+    QUERY_BUDGET = 12
+    ROWS = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+        categories = Category.objects.bulk_create(
+            Category(name=f'Категорія {i}', slug=f'category-{i}') for i in range(cls.ROWS)
+        )
+        Product.objects.bulk_create(
+            Product(category=categories[i], title=f'Товар {i}', sku=f'SKU-{i}') for i in range(cls.ROWS)
+        )
+
+        groups = SettingGroup.objects.bulk_create(SettingGroup(name=f'Група {i}') for i in range(10))
+        settings = Setting.objects.bulk_create(
+            Setting(group=groups[i % len(groups)], name=f'Налаштування {i}', key=f'key-{i}', setting_type='list')
+            for i in range(cls.ROWS)
+        )
+        SettingValue.objects.bulk_create(
+            SettingValue(setting=settings[i], value=f'Значення {i}') for i in range(cls.ROWS)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def assertChangelistWithinBudget(self, url_name, query=None):
+        url = reverse(url_name)
+        # Перший запит прогріває кеші (сесія, ContentType) - рахується другий
+        self.client.get(url, query)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, query)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), self.ROWS)
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context), self.QUERY_BUDGET,
+            f'{url_name}: {len(context)} запитів при бюджеті {self.QUERY_BUDGET}\n{queries}',
+        )
+        return response
+
+    def test_product_changelist(self):
+        response = self.assertChangelistWithinBudget('admin:gir_product_changelist')
+        self.assertContains(response, 'Категорія 42')
+
+    def test_product_changelist_category_filter(self):
+        category = Category.objects.get(name='Категорія 7')
+        response = self.client.get(
+            reverse('admin:gir_product_changelist'), {'category__id__exact': category.pk}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([product.title for product in response.context['cl'].result_list], ['Товар 7'])
+        # У фільтрі лише вибрана категорія, решта - через автодоповнення
+        filter_spec = response.context['cl'].filter_specs[0]
+        self.assertEqual(filter_spec.lookup_choices, [(category.pk, 'Категорія 7')])
+
+    def test_setting_changelist(self):
+        response = self.assertChangelistWithinBudget('admin:gir_setting_changelist')
+        self.assertContains(response, 'Налаштування 42 (Група 2)')
+
+    def test_settingvalue_changelist(self):
+        response = self.assertChangelistWithinBudget('admin:gir_settingvalue_changelist')
+        self.assertContains(response, 'Налаштування 42 (Група 2)')
+
+
+class NumberParsingTests(SimpleTestCase):
+    def test_to_decimal(self):
+        cases = [
+            (5, Decimal('5')),
+            (6.9, Decimal('6.9')),
+            (Decimal('1.50'), Decimal('1.50')),
+            ('1234.5', Decimal('1234.5')),
+            ('1 234,50', Decimal('1234.50')),
+            ('1\u00a0234,5', Decimal('1234.5')),
+            ('1,234.50', Decimal('1234.50')),
+            ('1.234,50', Decimal('1234.50')),
+            ("1'234", Decimal('1234')),
+            ('  7 ', Decimal('7')),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(to_decimal(value), expected)
+
+    def test_to_decimal_invalid(self):
+        for value in ['abc', '', 'nan', 'inf', True, None, datetime(2025, 5, 1)]:
+            with self.subTest(value=value):
+                with self.assertRaises(InvalidNumber):
+                    to_decimal(value)
+
+    def test_parse_int(self):
+        self.assertIsNone(parse_int(None))
+        self.assertIsNone(parse_int('  '))
+        self.assertEqual(parse_int('', default=0), 0)
+        self.assertEqual(parse_int('12'), 12)
+        self.assertEqual(parse_int(3.9), 3)
+        self.assertEqual(parse_int('-2,7'), -2)
+        with self.assertRaises(InvalidNumber):
+            parse_int(2 ** 31)
+        with self.assertRaises(InvalidNumber):
+            parse_int('12 шт')
+
+    def test_parse_decimal(self):
+        self.assertIsNone(parse_decimal(None))
+        self.assertIsNone(parse_decimal(''))
+        self.assertEqual(parse_decimal('10,345'), Decimal('10.35'))
+        self.assertEqual(parse_decimal(0.125), Decimal('0.13'))
+        self.assertEqual(parse_decimal('1 000'), Decimal('1000.00'))
+        with self.assertRaises(InvalidNumber):
+            parse_decimal(10 ** 8)
+        with self.assertRaises(InvalidNumber):
+            parse_decimal('$5')
+
+    def test_invalid_optional_number_keeps_row(self):
+        transformer = RowTransformer({'category': 0, 'title': 1, 'modules_count': 2, 'stock_quantity': 3})
+        data = transformer(('Розетки', 'Розетка', datetime(2025, 5, 2), 'багато'))
+        invalid = transformer.convert_columns([data])
+        self.assertEqual(invalid, {0: [('modules_count', datetime(2025, 5, 2)), ('stock_quantity', 'багато')]})
+        self.assertIsNone(data['modules_count'])
+        self.assertEqual(data['stock_quantity'], 0)
+        self.assertTrue(data['import_hash'])
+
+
+class ProductImporterTests(TestCase):
+    """Пакетний запис рядків: зіставлення, незмінені рядки, межі пачок, задовгі значення"""
+    columns = {'category': 0, 'title': 1, 'sku': 2, 'stock_quantity': 3}
+
+    def run_import(self, rows, batch_size=2):
+        checkpoints = []
+        importer = ProductImporter(
+            batch_size=batch_size, checkpoint=lambda sheet, row: checkpoints.append(row),
+        )
+        importer.begin_sheet('Аркуш')
+        numbered = enumerate(rows, start=2)
+        for row_num, data, values, error in parse_rows(numbered, RowTransformer(self.columns)):
+            if error is not None:
+                importer.add_error(row_num, error, values=values)
+            if data is not None:
+                importer.add(row_num, data)
+        importer.flush()
+        return importer.stats, checkpoints
+
+    def stock(self):
+        return dict(Product.objects.values_list('title', 'stock_quantity'))
+
+    def test_max_lengths_match_models(self):
+        self.assertEqual(MAX_LENGTHS['category'], Category._meta.get_field('name').max_length)
+        for name, limit in MAX_LENGTHS.items():
+            if name != 'category':
+                self.assertEqual(limit, Product._meta.get_field(name).max_length, name)
+
+    def test_too_long_values_do_not_abort_batch(self):
+        stats, checkpoints = self.run_import([
+            ('Кабелі', 'Кабель A', 'S1', 1),
+            ('Кабелі', 'К' * 501, '', 1),
+            ('Кабелі', 'Кабель B', 'S' * 101, 1),
+            ('К' * 256, 'Кабель C', '', 1),
+            ('Кабелі', 'Кабель D', '', 1),
+        ])
+        self.assertEqual((stats.created, stats.errors), (2, 3))
+        self.assertEqual(sorted(self.stock()), ['Кабель A', 'Кабель D'])
+        self.assertEqual(checkpoints, [6])
+
+    def test_match_by_sku_then_title(self):
+        category = Category.objects.create(name='Кабелі', slug='cables')
+        by_sku = Product.objects.create(category=category, title='Стара назва', sku='S1')
+        by_title = Product.objects.create(category=category, title='Кабель B')
+        stats, _ = self.run_import([
+            ('Кабелі', 'Нова назва', 'S1', 5),
+            ('Кабелі', '  кабель   b ', '', 7),
+            ('Кабелі', 'Кабель C', 'S2', 3),
+        ])
+        self.assertEqual((stats.created, stats.updated), (1, 2))
+        by_sku.refresh_from_db()
+        by_title.refresh_from_db()
+        self.assertEqual((by_sku.title, by_sku.stock_quantity), ('Нова назва', 5))
+        self.assertEqual((by_title.title, by_title.stock_quantity), ('кабель   b', 7))
+        self.assertEqual(Product.objects.get(sku='S2').stock_quantity, 3)
+
+    def test_unchanged_rows_are_not_rewritten(self):
+        rows = [('Кабелі', 'Кабель A', 'S1', 1), ('Кабелі', 'Кабель B', '', 2), ('Кабелі', 'Кабель C', '', 3)]
+        self.run_import(rows)
+        updated_at = dict(Product.objects.values_list('title', 'updated_at'))
+
+        stats, _ = self.run_import(rows)
+        self.assertEqual((stats.created, stats.updated, stats.unchanged), (0, 0, 3))
+        self.assertEqual(dict(Product.objects.values_list('title', 'updated_at')), updated_at)
+
+        rows[1] = ('Кабелі', 'Кабель B', '', 20)
+        stats, _ = self.run_import(rows)
+        self.assertEqual((stats.updated, stats.unchanged), (1, 2))
+        self.assertEqual(self.stock()['Кабель B'], 20)
+
+    def test_batch_boundaries(self):
+        stats, checkpoints = self.run_import([
+            ('Кабелі', 'Кабель A', '', 1),
+            ('Кабелі', 'Кабель A', '', 2),
+            ('Кабелі', 'Кабель B', '', 3),
+            ('Кабелі', 'Кабель A', '', 4),
+            ('Розетки', 'Розетка', '', 5),
+        ])
+        # Повтор у тій самій пачці і в наступній оновлює один і той самий товар
+        self.assertEqual((stats.rows, stats.created, stats.updated, stats.categories), (5, 3, 2, 2))
+        self.assertEqual(self.stock(), {'Кабель A': 4, 'Кабель B': 3, 'Розетка': 5})
+        self.assertEqual(checkpoints, [3, 5, 6])
+
+
+class CatalogApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Кабелі', slug='cables')
+        cls.other_category = Category.objects.create(name='Розетки', slug='sockets')
+        cls.products = [
+            Product.objects.create(category=cls.category, title=title, stock_quantity=stock)
+            for title, stock in [('Кабель A', 5), ('Кабель B', 0), ('Кабель B', 3), ('Кабель C', 1), ('Кабель D', 2)]
+        ]
+        cls.user = FrontendUser.objects.create(username='client', email='client@example.com', password='x')
+
+    def setUp(self):
+        session = self.client.session
+        session['frontend_user_id'] = self.user.pk
+        session.save()
+
+    def get(self, url, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, **headers)
+
+    def assertChangedAfter(self, url, change, missing=None):
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.get(url, etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        if missing is not None:
+            self.assertNotIn(missing.pk, [item['id'] for item in response.json()['results']])
+
+    def test_anonymous_forbidden(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/products/').status_code, 403)
+
+    def test_update_changes_etag(self):
+        product = self.products[0]
+
+        def rename():
+            product.title = 'Кабель A1'
+            product.save()
+        self.assertChangedAfter('/api/products/', rename)
+
+    def test_product_leaving_filter_changes_etag(self):
+        product = self.products[0]
+
+        def deactivate():
+            product.is_active = False
+            product.save()
+        self.assertChangedAfter('/api/products/?is_active=true', deactivate, missing=product)
+
+        product = self.products[2]
+
+        def sell_out():
+            product.stock_quantity = 0
+            product.save()
+        self.assertChangedAfter('/api/products/?in_stock=true', sell_out, missing=product)
+
+        product = self.products[3]
+
+        def move():
+            product.category = self.other_category
+            product.save()
+        self.assertChangedAfter(f'/api/products/?category={self.category.pk}', move, missing=product)
+
+    def test_delete_changes_etag(self):
+        product = self.products[4]
+        self.assertChangedAfter('/api/products/', product.delete, missing=product)
+
+    def test_keyset_paging(self):
+        url = '/api/products/?page_size=2'
+        seen = []
+        pages = 0
+        while url:
+            data = self.client.get(url).json()
+            seen.extend((item['title'], item['id']) for item in data['results'])
+            url = data['next']
+            pages += 1
+        # Однакові назви розрізняються за id; кожен товар рівно один раз
+        self.assertEqual(seen, sorted((product.title, product.pk) for product in self.products))
+        self.assertEqual(pages, 3)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/products/?cursor=broken').status_code, 404)
+
+
+class PrivateStorageTestCase(TestCase):
+    """Приватне сховище в тимчасовому каталозі; ``staff`` без прав, ``importer`` з ``gir.add_product``"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='password', is_staff=True)
+        cls.importer = User.objects.create_user('importer', password='password', is_staff=True)
+        cls.importer.user_permissions.add(Permission.objects.get(codename='add_product'))
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(PRIVATE_MEDIA_ROOT=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.root = directory.name
+
+
+class PrivateFileTests(PrivateStorageTestCase):
+    """Файли імпорту віддаються лише через адмінку і лише з правом ``gir.add_product``"""
+
+    def setUp(self):
+        super().setUp()
+        self.name = private_storage.save('import_errors/test.xlsx', ContentFile(b'data'))
+        self.url = private_storage.url(self.name)
+
+    def test_url_is_not_public(self):
+        self.assertTrue(self.url.startswith('/admin/'))
+
+    def test_anonymous_redirected_to_login(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/admin/login/', response['Location'])
+
+    def test_staff_without_permission_forbidden(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_download(self):
+        self.client.force_login(self.importer)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'data')
+
+    def test_missing_and_outside_files(self):
+        self.client.force_login(self.importer)
+        for name in ['import_errors/missing.xlsx', '../manage.py', '%2E%2E/manage.py']:
+            with self.subTest(name=name):
+                response = self.client.get(f'/admin/gir/product/import-files/{name}')
+                self.assertEqual(response.status_code, 404)
+
+
+class ImportUploadTests(PrivateStorageTestCase):
+    upload_id = 'a' * 32
+
+    def upload(self, offset, data):
+        return self.client.post(reverse('admin:import_upload'), {
+            'upload_id': self.upload_id,
+            'offset': offset,
+            'chunk': SimpleUploadedFile('blob', data),
+        })
+
+    def test_views_require_permission(self):
+        job = ImportJob.objects.create(file='temp_imports/test.xlsx', original_name='test.xlsx')
+        self.client.force_login(self.staff)
+        urls = [
+            reverse('admin:import_excel'),
+            reverse('admin:sync_stock'),
+            reverse('admin:import_upload') + f'?upload_id={self.upload_id}',
+            reverse('admin:import_job_status', args=[job.pk]),
+            reverse('admin:import_job_progress', args=[job.pk]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.upload(0, b'data').status_code, 403)
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'temp_imports')))
+
+    def test_chunked_upload_is_private_with_random_name(self):
+        template = ImportTemplate.objects.create(name='Шаблон', field_mapping={'category': 0, 'title': 1})
+        self.client.force_login(self.importer)
+        self.assertEqual(self.upload(0, b'PK').json()['received'], 2)
+        self.assertEqual(self.upload(1, b'xx').status_code, 409)
+        self.assertEqual(self.upload(2, b'data').json()['received'], 6)
+
+        response = self.client.post(reverse('admin:import_excel'), {
+            'import_template': template.pk,
+            'upload_id': self.upload_id,
+            'upload_name': '../Прайс постачальника.xlsx',
+        })
+        job = ImportJob.objects.get()
+        self.assertRedirects(response, reverse('admin:import_job_status', args=[job.pk]))
+        self.assertEqual(job.original_name, '../Прайс постачальника.xlsx')
+        self.assertRegex(job.file.name, r'^temp_imports/[0-9a-f]{32}\.xlsx$')
+        self.assertTrue(job.file.path.startswith(self.root))
+        with job.file.open('rb') as f:
+            self.assertEqual(f.read(), b'PKdata')
+        self.assertTrue(job.file.url.startswith('/admin/'))
+
+
+class ScryptHasherTests(SimpleTestCase):
+    def test_verifies_hash_with_higher_work_factor(self):
+        # 128 * 8 * (2**15 + 3) байтів - більше, ніж ліміт, порахований з поточних 2**14
+        hasher = TunableScryptPasswordHasher()
+        encoded = hasher.encode('secret', hasher.salt(), n=2 ** 15)
+        self.assertTrue(hasher.verify('secret', encoded))
+        self.assertFalse(hasher.verify('wrong', encoded))
+        self.assertTrue(hasher.must_update(encoded))
+
+
+@override_settings(PASSWORD_HASHERS=[
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+    'gir.hashers.TunableScryptPasswordHasher',
+])
+class FrontendLoginTests(TestCase):
+    ip = '203.0.113.7'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = FrontendUser.objects.create(
+            username='client', email='client@example.com', password=make_password('secret', hasher='md5'),
+        )
+
+    def setUp(self):
+        for ip in [self.ip, '203.0.113.8']:
+            for key in _attempt_keys('client', ip):
+                caches[ATTEMPTS_CACHE].delete(key)
+                self.addCleanup(caches[ATTEMPTS_CACHE].delete, key)
+
+    def login(self, password, ip=None):
+        request = RequestFactory().post('/login/', REMOTE_ADDR=ip or self.ip)
+        return authenticate_frontend_user(request, 'client', password)
+
+    @override_settings(FRONTEND_PASSWORD_HASHER='scrypt')
+    def test_rehash_on_login(self):
+        self.assertEqual(self.login('secret'), self.user)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$'))
+        self.assertEqual(self.login('secret'), self.user)
+
+    @override_settings(FRONTEND_PASSWORD_HASHER='md5')
+    def test_wrong_password_keeps_hash(self):
+        encoded = self.user.password
+        self.assertIsNone(self.login('wrong'))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, encoded)
+
+    @override_settings(FRONTEND_PASSWORD_HASHER='md5')
+    def test_throttling(self):
+        for _ in range(MAX_ATTEMPTS):
+            self.assertIsNone(self.login('wrong'))
+        # Після ліміту відмова навіть з вірним паролем, але лише для цієї пари логін+IP
+        with self.assertRaises(LoginThrottled):
+            self.login('secret')
+        self.assertEqual(self.login('secret', ip='203.0.113.8'), self.user)
+
+    @override_settings(FRONTEND_PASSWORD_HASHER='md5')
+    def test_successful_login_resets_attempts(self):
+        for _ in range(MAX_ATTEMPTS - 1):
+            self.login('wrong')
+        self.assertEqual(self.login('secret'), self.user)
+        for _ in range(MAX_ATTEMPTS - 1):
+            self.assertIsNone(self.login('wrong'))
+        self.assertEqual(self.login('secret'), self.user)
+
+
+class FrontendUserCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = FrontendUser.objects.create(username='client', email='client@example.com', password='x')
+
+    def setUp(self):
+        self.key = frontend_user_cache_key(self.user.pk)
+        self.addCleanup(caches[FRONTEND_USER_CACHE].delete, self.key)
+        load_frontend_user(self.user.pk)
+
+    def assertInvalidatedOnCommit(self, change):
+        cache = caches[FRONTEND_USER_CACHE]
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+            # До коміту інші процеси ще бачать старий рядок - кеш не чіпаємо
+            self.assertIsNotNone(cache.get(self.key))
+        self.assertIsNone(cache.get(self.key))
+
+    def test_deactivate(self):
+        def deactivate():
+            self.user.is_active = False
+            self.user.save()
+        self.assertInvalidatedOnCommit(deactivate)
+        self.assertIsNone(load_frontend_user(self.user.pk))
+
+    def test_delete(self):
+        user_id = self.user.pk
+        self.assertInvalidatedOnCommit(self.user.delete)
+        self.assertIsNone(load_frontend_user(user_id))
+
+
+class WriteBehindSessionTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        patcher = mock.patch('django.utils.timezone.now', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        session = SessionStore()
+        session['frontend_user_id'] = 1
+        session.create()
+        self.session_key = session.session_key
+        self.addCleanup(SessionStore(self.session_key).delete)
+
+    def db_expiry(self):
+        return Session.objects.get(session_key=self.session_key).expire_date
+
+    def extend(self, **data):
+        """Збереження сесії наступним запитом (з новими даними ``data``)"""
+        session = SessionStore(self.session_key)
+        session.update(data)
+        session.save()
+        return session
+
+    def test_extension_is_deferred_then_flushed(self):
+        created = self.db_expiry()
+        self.now += timedelta(hours=1)
+        session = self.extend()
+        # Продовження лише в кеші: база не змінилася, кеш бачить новий термін
+        self.assertEqual(self.db_expiry(), created)
+        self.assertEqual(SessionStore(self.session_key).get_expiry_date(), session.get_expiry_date())
+
+        self.now += timedelta(seconds=DB_SYNC_SECONDS)
+        session = self.extend()
+        self.assertEqual(self.db_expiry(), session.get_expiry_date())
+
+    def test_changed_data_written_immediately(self):
+        self.now += timedelta(minutes=1)
+        self.extend(frontend_user_id=2)
+        decoded = Session.objects.get(session_key=self.session_key).get_decoded()
+        self.assertEqual(decoded['frontend_user_id'], 2)
+
+    def test_cache_loss_falls_back_to_database(self):
+        self.now += timedelta(hours=1)
+        session = self.extend()
+        session._cache.delete(session.cache_key)
+        self.assertEqual(SessionStore(self.session_key)['frontend_user_id'], 1)
+
+    @override_settings(SESSION_ENGINE='gir.sessions')
+    def test_every_request_extends_session(self):
+        user = FrontendUser.objects.create(username='client', email='client@example.com', password='x')
+        self.addCleanup(caches[FRONTEND_USER_CACHE].delete, frontend_user_cache_key(user.pk))
+        session = self.extend(frontend_user_id=user.pk)
+        expiry = session.get_expiry_date()
+        self.client.cookies['sessionid'] = self.session_key
+
+        self.now += timedelta(hours=1)
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies['sessionid'].value, self.session_key)
+        self.assertEqual(SessionStore(self.session_key).get_expiry_date(), expiry + timedelta(hours=1))
+
+
+class StaleImportJobTests(TestCase):
+    def job(self, status=ImportJob.STATUS_RUNNING, heartbeat=None, started=None):
+        now = timezone.now()
+        return ImportJob.objects.create(
+            file='temp_imports/test.xlsx', status=status,
+            started_at=now - timedelta(seconds=started) if started is not None else None,
+            heartbeat_at=now - timedelta(seconds=heartbeat) if heartbeat is not None else None,
+        )
+
+    def test_only_stale_running_jobs_requeued(self):
+        alive = self.job(heartbeat=10, started=STALE_AFTER_SECONDS * 2)
+        stale = self.job(heartbeat=STALE_AFTER_SECONDS + 10)
+        legacy = self.job(started=STALE_AFTER_SECONDS + 10)
+        just_claimed = self.job(started=10)
+        done = self.job(status=ImportJob.STATUS_DONE, heartbeat=STALE_AFTER_SECONDS * 2)
+
+        self.assertEqual(requeue_stale_jobs(), 2)
+        statuses = dict(ImportJob.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {
+            alive.pk: ImportJob.STATUS_RUNNING,
+            stale.pk: ImportJob.STATUS_PENDING,
+            legacy.pk: ImportJob.STATUS_PENDING,
+            just_claimed.pk: ImportJob.STATUS_RUNNING,
+            done.pk: ImportJob.STATUS_DONE,
+        })